@@ -0,0 +1,9 @@
+import os
+
+from resttest import OK
+from resttest.gendocs.renderer import Renderer
+
+
+def bench_render_response(benchmark, collection):
+    renderer = Renderer('Benchmark', os.devnull)
+    benchmark(renderer.write_http_response, OK(collection))
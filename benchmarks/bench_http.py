@@ -0,0 +1,13 @@
+import typing
+
+from resttest import HTTPSession
+
+
+def bench_get_schemaless(benchmark, server_url):
+    session = HTTPSession()
+    benchmark(session.get, f'{server_url}items?size=100')
+
+
+def bench_get_typed(benchmark, server_url, item_type):
+    session = HTTPSession()
+    benchmark(session.get, f'{server_url}items?size=100', typing.Sequence[item_type])
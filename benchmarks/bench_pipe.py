@@ -0,0 +1,17 @@
+import re
+
+import pytest
+
+from resttest import matches
+
+
+def bench_matches_dict(benchmark, collection):
+    pattern = [{'id': int, 'kind': 'item', 'created_at': re.compile('.*Z'), 'child': {'kind': 'item'}} for _ in collection]
+    assert benchmark(lambda: collection | matches(pattern))
+
+
+@pytest.mark.parametrize('size', [3, 5, 6])
+def bench_matches_set(benchmark, size):
+    value = [{'n': i} for i in range(size)]
+    pattern = {matches(n = i) for i in reversed(range(size))}
+    assert benchmark(lambda: value | matches(pattern))
@@ -0,0 +1,23 @@
+import typing
+
+from payloads import make_document
+
+from resttest.schema import SchemaDocument, make_schemaless_object, serialize, unserialize
+
+
+def bench_unserialize(benchmark, item_type, collection):
+    benchmark(unserialize, typing.Sequence[item_type], collection)
+
+
+def bench_serialize(benchmark, item_type, collection):
+    objects = unserialize(typing.Sequence[item_type], collection)
+    benchmark(serialize, objects)
+
+
+def bench_make_schemaless_object(benchmark, collection):
+    benchmark(make_schemaless_object, collection)
+
+
+def bench_to_type(benchmark):
+    schema = make_document(depth = 4, width = 8)
+    benchmark(lambda: SchemaDocument(schema).to_type(schema))
@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from payloads import make_collection, make_type
+from server import start_server
+
+SIZES = [10, 1000]
+
+
+@pytest.fixture(scope = 'session')
+def server_url():
+    server = start_server()
+    yield f'http://127.0.0.1:{server.server_port}/'
+    server.shutdown()
+
+
+@pytest.fixture(scope = 'session')
+def item_type():
+    return make_type(depth = 2, width = 4)
+
+
+@pytest.fixture(scope = 'session', params = SIZES, ids = lambda size: f'size{size}')
+def collection(request):
+    return make_collection(size = request.param, depth = 2, width = 4)
@@ -0,0 +1,59 @@
+"""Synthetic schemas and payloads of configurable size and nesting"""
+
+import random
+from datetime import datetime, timedelta, timezone
+
+from resttest.schema import ALWAYS_DICTS, make_schemaless_object, schema_to_type
+
+
+def make_schema(depth = 2, width = 4):
+    """Object schema with `width` scalar properties and one nested object/array level per `depth`."""
+    properties = {
+        'id': {'type': 'integer'},
+        'kind': {'const': 'item'},
+        'created_at': {'type': 'string', 'format': 'date-time'},
+        'name': {'type': ['string', 'null']},
+    }
+    for i in range(width):
+        properties[f'field{i}'] = {'type': 'number'}
+
+    if depth > 0:
+        child = make_schema(depth - 1, width)
+        properties['child'] = child
+        properties['children'] = {'type': 'array', 'items': child}
+
+    return {'title': f'Level{depth}', 'type': 'object', 'properties': properties}
+
+
+def make_document(depth = 2, width = 4):
+    return make_schemaless_object(dict(make_schema(depth, width), definitions = {}), ALWAYS_DICTS)
+
+
+def make_type(depth = 2, width = 4):
+    return schema_to_type(make_document(depth, width))
+
+
+def make_payload(depth = 2, width = 4, fanout = 3, seed = 0, _rng = None):
+    """Data matching make_schema(depth, width), with `fanout` items in every nested array."""
+    rng = _rng or random.Random(seed)
+    epoch = datetime(2020, 1, 1, tzinfo = timezone.utc)
+
+    data = {
+        'id': rng.randrange(1 << 31),
+        'kind': 'item',
+        'created_at': (epoch + timedelta(seconds = rng.randrange(1 << 24))).isoformat().replace('+00:00', 'Z'),
+        'name': rng.choice([None, f'name{rng.randrange(1000)}']),
+    }
+    for i in range(width):
+        data[f'field{i}'] = rng.random()
+
+    if depth > 0:
+        data['child'] = make_payload(depth - 1, width, fanout, _rng = rng)
+        data['children'] = [make_payload(depth - 1, width, fanout, _rng = rng) for _ in range(fanout)]
+
+    return data
+
+
+def make_collection(size = 100, depth = 2, width = 4, fanout = 3, seed = 0):
+    rng = random.Random(seed)
+    return [make_payload(depth, width, fanout, _rng = rng) for _ in range(size)]
@@ -0,0 +1,37 @@
+"""Local stand-in HTTP server serving synthetic payloads"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from payloads import make_collection
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    cache = {}
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: int(v[0]) for k, v in parse_qs(url.query).items()}
+        key = tuple(sorted(params.items()))
+        body = self.cache.get(key)
+        if body is None:
+            body = self.cache[key] = json.dumps(make_collection(**params)).encode()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(host = '127.0.0.1', port = 0):
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target = server.serve_forever, daemon = True).start()
+    return server
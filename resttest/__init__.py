@@ -1,6 +1,15 @@
-from resttest.http import HTTPSession, HTTPResponse, HTTP200_OK, OK, HTTP201_Created, Created, HTTP204_NoContent, NoContent, HTTP303_SeeOther, SeeOther, HTTP400_BadRequest, BadRequest, HTTP401_NotAuthenticated, NotAuthenticated, HTTP403_Forbidden, Forbidden, HTTP404_NotFound, NotFound, HTTP405_MethodNotAllowed, MethodNotAllowed, HTTP409_Conflict, Conflict, HTTP500_InternalServerError, InternalServerError, HTTP501_NotImplemented, NotImplemented
-from resttest.mailbox import MailBox
+from resttest.http import HTTPSession, AsyncHTTPSession, HTTPResponse, HTTP200_OK, OK, HTTP201_Created, Created, HTTP204_NoContent, NoContent, HTTP303_SeeOther, SeeOther, HTTP400_BadRequest, BadRequest, HTTP401_NotAuthenticated, NotAuthenticated, HTTP403_Forbidden, Forbidden, HTTP404_NotFound, NotFound, HTTP405_MethodNotAllowed, MethodNotAllowed, HTTP409_Conflict, Conflict, HTTP429_TooManyRequests, TooManyRequests, HTTP500_InternalServerError, InternalServerError, HTTP501_NotImplemented, NotImplemented, HTTP502_BadGateway, BadGateway, HTTP503_ServiceUnavailable, ServiceUnavailable, HTTP504_GatewayTimeout, GatewayTimeout
+from resttest.mailbox import AsyncMailBox, MailBox
 from resttest.pipe import matches, not_equal_to
 from resttest.uuid import uuid4
 from resttest.patterns import URL, HTTPS_URL
-from resttest.conf import BASE_URL
+from resttest.conf import BASE_URL, Settings, configure
+from resttest.stats import budget
+from resttest.validation import ValidationError
+from resttest.retry import Retry, TokenBucket
+from resttest.pools import pool
+from resttest.sessions import SessionCache
+from resttest.columns import Columns
+from resttest.cache import ResponseCache
+from resttest.streaming import Event
+from resttest.snapshot import matches_snapshot
@@ -0,0 +1,80 @@
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+from urllib.parse import urlsplit
+
+
+class CacheEntry(NamedTuple):
+    etag: str
+    last_modified: str
+    response: object
+    size: int
+
+
+def _path(url):
+    parts = urlsplit(url)
+    return parts.netloc, parts.path.rstrip('/')
+
+
+class ResponseCache:
+    """LRU cache of decoded GET responses, revalidated with If-None-Match / If-Modified-Since
+
+    Entries are evicted once their total body size exceeds `max_bytes`. Any non-GET request to a path drops the cached responses of that path and of its parent collection.
+    Cached response objects are shared between the requests that hit them, so tests shouldn't modify them.
+    """
+
+    def __init__(self, max_bytes = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._paths = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            self._paths.setdefault(_path(key[0]), set()).add(key)
+            self.size += entry.size
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.size -= entry.size
+        path = _path(key[0])
+        keys = self._paths.get(path)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._paths[path]
+
+    def invalidate(self, url):
+        netloc, path = _path(url)
+        parent = path.rsplit('/', 1)[0]
+        with self._lock:
+            for p in {path, parent}:
+                for key in list(self._paths.get((netloc, p), ())):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._paths.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._entries)
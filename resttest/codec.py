@@ -0,0 +1,36 @@
+import json
+import typing
+
+
+class Codec(typing.NamedTuple):
+    dumps: typing.Callable[[typing.Any], typing.Union[str, bytes]]
+    loads: typing.Callable[[typing.Union[str, bytes]], typing.Any]
+
+
+def _json():
+    return Codec(json.dumps, json.loads)
+
+
+def _orjson():
+    import orjson
+    return Codec(orjson.dumps, orjson.loads)
+
+
+def _ujson():
+    import ujson
+    return Codec(ujson.dumps, ujson.loads)
+
+
+_codecs = {
+    'json': _json,
+    'orjson': _orjson,
+    'ujson': _ujson,
+}
+
+
+def get_codec(name) -> Codec:
+    try:
+        factory = _codecs[name]
+    except KeyError as e:
+        raise ValueError(f'Unknown codec: {name}') from e
+    return factory()
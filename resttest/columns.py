@@ -0,0 +1,196 @@
+import operator
+from array import array
+from datetime import datetime, timezone
+from itertools import islice
+
+from resttest.schema import unserialize
+
+EPOCH = datetime(1970, 1, 1, tzinfo = timezone.utc)
+
+_missing = object()
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _epoch_us(value):
+    if not isinstance(value, str):
+        raise ValueError(datetime)
+    if not value.endswith('Z'):
+        raise NotImplementedError('Parsing dates with non-Z timezones is not supported.')
+    delta = datetime.fromisoformat(value[:-1]).replace(tzinfo = timezone.utc) - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def _checked(kind):
+    def check(value):
+        if not isinstance(value, kind) or isinstance(value, bool) != (kind is bool):
+            raise ValueError(kind)
+        return value
+
+    return check
+
+
+# typecode, per-value conversion
+_array_types = {
+    int: ('q', _checked(int)),
+    float: ('d', _checked(float)),
+    bool: ('b', _checked(bool)),
+    datetime: ('q', _epoch_us),
+}
+
+_list_types = {
+    str: _checked(str),
+}
+
+
+class Column:
+    """Values of a single property, stored in an array (int64/float64/bool; datetimes as int64 microseconds since the epoch) or a list"""
+
+    def __init__(self, name, values):
+        self.name = name
+        self.values = values
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __getitem__(self, index):
+        return self.values[index]
+
+    def __repr__(self):
+        return f'Column({self.name!r}, {self.values!r})'
+
+    def to_numpy(self):
+        numpy = _numpy()
+        if numpy is None:
+            raise ImportError('numpy is required for Column.to_numpy()')
+        if isinstance(self.values, array):
+            dtype = {'q': numpy.int64, 'd': numpy.float64, 'b': numpy.int8}[self.values.typecode]
+            result = numpy.frombuffer(self.values, dtype = dtype)
+            return result.astype(bool) if self.values.typecode == 'b' else result
+        return numpy.array(self.values, dtype = object)
+
+    def _sorted(self, compare, numpy_compare):
+        numpy = _numpy()
+        if numpy is not None and isinstance(self.values, array):
+            return bool(numpy_compare(numpy.diff(self.to_numpy()), 0).all())
+        return all(map(compare, self.values, islice(self.values, 1, None)))
+
+    def ascending(self, strict = False) -> bool:
+        return self._sorted(operator.lt if strict else operator.le, operator.gt if strict else operator.ge)
+
+    def descending(self, strict = False) -> bool:
+        return self._sorted(operator.gt if strict else operator.ge, operator.lt if strict else operator.le)
+
+    def all_in(self, allowed) -> bool:
+        numpy = _numpy()
+        if numpy is not None and isinstance(self.values, array):
+            return bool(numpy.isin(self.to_numpy(), list(allowed)).all())
+        allowed = set(allowed)
+        return all(value in allowed for value in self.values)
+
+    def all(self, predicate) -> bool:
+        return all(map(predicate, self.values))
+
+    def min(self):
+        return min(self.values)
+
+    def max(self):
+        return max(self.values)
+
+
+class Table:
+    """Homogeneous array of objects decoded column by column"""
+
+    Model = None
+
+    def __init__(self, columns, length):
+        self.columns = columns
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def __getattr__(self, name):
+        try:
+            return self.columns[name]
+        except KeyError as e:
+            raise AttributeError(name) from e
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def rows(self):
+        """Materialize the rows as dicts (datetimes stay as epoch microseconds)."""
+        names = list(self.columns)
+        for values in zip(*(self.columns[name].values for name in names)):
+            yield dict(zip(names, values))
+
+    def __repr__(self):
+        return f'{type(self).__name__}({len(self)} rows, columns = {", ".join(self.columns)})'
+
+    @classmethod
+    def decode(cls, data, validate = False):
+        Model = cls.Model
+        if not isinstance(data, list):
+            raise ValueError(cls)
+
+        validator = getattr(Model, '__resttest_validator__', None) if validate else None
+        defaults = {name: getattr(Model, name) for name in Model.__annotations__ if name in Model.__dict__}
+
+        for row in data:
+            if not isinstance(row, dict):
+                raise ValueError(Model)
+            if validator is not None:
+                validator(row)
+            missing = set(Model.__annotations__) - set(row) - set(defaults)
+            if missing:
+                raise TypeError(f'{Model.__name__} is missing required properties: {", ".join(missing)}')
+
+        columns = {}
+        for name, prop_type in Model.__annotations__.items():
+            array_type = _array_types.get(prop_type)
+            if name in defaults:
+                raw = [row[name] if name in row else _missing for row in data]
+            else:
+                raw = [row[name] for row in data]
+
+            if array_type is not None and defaults.get(name) is None and name in defaults:
+                # Optional without a usable default - can't be stored in an array.
+                array_type = None
+
+            if array_type is not None:
+                typecode, convert = array_type
+                if name in defaults:
+                    default = convert(defaults[name])
+                    values = array(typecode, (default if value is _missing else convert(value) for value in raw))
+                else:
+                    values = array(typecode, map(convert, raw))
+            else:
+                convert = _list_types.get(prop_type) or (lambda value: unserialize(prop_type, value, False))
+                values = [defaults[name] if value is _missing else convert(value) for value in raw]
+
+            columns[name] = Column(name, values)
+
+        return cls(columns, len(data))
+
+
+class Columns:
+    """Return type that decodes a JSON array of `Model`s into a Table of per-property columns: `return_type = Columns[Model]`"""
+
+    _tables = {}
+
+    def __class_getitem__(cls, Model):
+        try:
+            return cls._tables[Model]
+        except KeyError:
+            table = cls._tables[Model] = type(f'Columns[{Model.__name__}]', (Table,), dict(Model = Model, __resttest_columns__ = True))
+            return table
@@ -0,0 +1,52 @@
+import gzip
+import typing
+import zlib
+
+from urllib3.util.request import ACCEPT_ENCODING
+
+Compressor = typing.Callable[[bytes], bytes]
+
+
+def _gzip() -> Compressor:
+    return gzip.compress
+
+
+def _deflate() -> Compressor:
+    return zlib.compress
+
+
+def _brotli() -> Compressor:
+    import brotli
+    return brotli.compress
+
+
+def _zstd() -> Compressor:
+    import zstandard
+
+    # ZstdCompressor is not thread-safe, and sessions are shared by threads.
+    def compress(data):
+        return zstandard.ZstdCompressor().compress(data)
+
+    return compress
+
+
+_compressors = {
+    'gzip': _gzip,
+    'deflate': _deflate,
+    'br': _brotli,
+    'zstd': _zstd,
+}
+
+
+def get_compressor(name) -> Compressor:
+    """Function compressing request bodies with the given Content-Encoding"""
+    try:
+        factory = _compressors[name]
+    except KeyError as e:
+        raise ValueError(f'Unknown compression: {name}') from e
+    return factory()
+
+
+def accept_encoding() -> str:
+    """Every response encoding the installed urllib3 can decode (br and zstd need brotli / zstandard)"""
+    return ACCEPT_ENCODING
@@ -1,4 +1,176 @@
-# TODO Find a way to actually configure these :D
+import os
+import sys
+from dataclasses import asdict, dataclass, fields, replace
+from typing import Optional
 
-BASE_URL = 'http://localhost:8000/'
-MAILCATCHER_URL = 'http://localhost:1080/'
+ENV_PREFIX = 'RESTTEST_'
+
+
+@dataclass(frozen = True)
+class Settings:
+    """resttest configuration
+
+    Values come from (in order of precedence) keyword overrides, RESTTEST_* environment variables, the [tool.resttest] section of pyproject.toml and the defaults below.
+    """
+
+    base_url: str = 'http://localhost:8000/'
+    mailcatcher_url: str = 'http://localhost:1080/'
+    mailcatcher_purge: bool = True
+
+    pool_connections: int = 10
+    pool_maxsize: int = 10
+    timeout: Optional[float] = None
+    max_concurrency: int = 10
+
+    retries: int = 0
+    rate_limit: Optional[float] = None
+
+    codec: str = 'json'
+    compression: Optional[str] = None
+    compression_min_bytes: int = 1024
+    accept_encoding: Optional[str] = None
+    response_cache_bytes: int = 0
+    validate: bool = False
+    cache_dir: str = '.resttest'
+    schema_cache: bool = False
+    snapshot_dir: str = 'snapshots'
+    update_snapshots: bool = False
+    profile_dir: Optional[str] = None
+    profile_memory: bool = False
+
+    def replace(self, **changes) -> 'Settings':
+        return replace(self, **changes) if changes else self
+
+
+# URL settings that may list one API instance per xdist worker, with the values they were given before sharding.
+_SHARDED = ('base_url', 'mailcatcher_url')
+_unsharded = {}
+
+
+def worker_index() -> int:
+    """Index of the current pytest-xdist worker (gw0 -> 0), 0 when not running under xdist."""
+    worker = os.environ.get('PYTEST_XDIST_WORKER', '')
+    digits = worker.lstrip('abcdefghijklmnopqrstuvwxyz')
+    return int(digits) if digits.isdigit() else 0
+
+
+def shard(url, index = None) -> str:
+    """Pick the URL this worker should talk to.
+
+    `url` is either a list of URLs (one API instance per worker, assigned round-robin) or a single URL, optionally containing a `{worker}` placeholder.
+    """
+    if index is None:
+        index = worker_index()
+    if isinstance(url, (list, tuple)):
+        url = url[index % len(url)]
+    return url.replace('{worker}', str(index))
+
+
+def _find_pyproject(start = None):
+    directory = os.path.abspath(start or os.getcwd())
+    while True:
+        candidate = os.path.join(directory, 'pyproject.toml')
+        if os.path.isfile(candidate):
+            return candidate
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+
+def _load_toml(path):
+    if sys.version_info >= (3, 11):
+        import tomllib
+    else:
+        try:
+            import tomli as tomllib
+        except ImportError:
+            return {}
+
+    with open(path, 'rb') as f:
+        return tomllib.load(f)
+
+
+def _parse(field, value):
+    if not isinstance(value, str):
+        return value
+
+    if field.name in ('base_url', 'mailcatcher_url') and ',' in value:
+        return [url.strip() for url in value.split(',') if url.strip()]
+
+    if field.type in (bool, 'bool'):
+        return value.lower() in ('1', 'true', 'yes', 'on')
+    if field.type in (int, 'int'):
+        return int(value)
+    if field.type in (Optional[float], 'Optional[float]'):
+        return float(value) if value else None
+    return value
+
+
+def load_settings(environ = None, pyproject = None, **overrides) -> Settings:
+    environ = os.environ if environ is None else environ
+    pyproject = _find_pyproject() if pyproject is None else pyproject
+
+    values = {}
+    if pyproject:
+        values.update(_load_toml(pyproject).get('tool', {}).get('resttest', {}))
+
+    for field in fields(Settings):
+        env_value = environ.get(ENV_PREFIX + field.name.upper())
+        if env_value is not None:
+            values[field.name] = env_value
+
+    values.update(overrides)
+
+    known = {field.name: field for field in fields(Settings)}
+    unknown = set(values.keys()) - set(known.keys())
+    if unknown:
+        raise TypeError(f'Unknown resttest settings: {", ".join(sorted(unknown))}')
+
+    values = {name: _parse(known[name], value) for name, value in values.items()}
+    for name in _SHARDED:
+        if name in values:
+            _unsharded[name] = values[name]
+            values[name] = shard(values[name])
+
+    return Settings(**values)
+
+
+def configure(**changes) -> Settings:
+    """Override settings for the rest of the process."""
+    global settings, BASE_URL, MAILCATCHER_URL
+
+    for name in _SHARDED:
+        if name in changes:
+            _unsharded[name] = changes[name]
+            changes[name] = shard(changes[name])
+
+    settings = settings.replace(**changes)
+    BASE_URL = settings.base_url
+    MAILCATCHER_URL = settings.mailcatcher_url
+
+    resttest = sys.modules.get('resttest')
+    if resttest is not None and hasattr(resttest, 'BASE_URL'):
+        resttest.BASE_URL = BASE_URL
+
+    return settings
+
+
+def reshard() -> Settings:
+    """Pick the URLs of the current xdist worker again (after its id becomes known), keeping all other settings."""
+    return configure(**{name: value for name, value in _unsharded.items()})
+
+
+def reload(**overrides) -> Settings:
+    """Re-read the environment and pyproject.toml (e.g. after the xdist worker id becomes known)."""
+    _unsharded.clear()
+    values = asdict(load_settings(**overrides))
+    # Shard again from the URL lists load_settings() recorded, not from the URLs it already picked.
+    values.update(_unsharded)
+    return configure(**values)
+
+
+settings = load_settings()
+
+BASE_URL = settings.base_url
+MAILCATCHER_URL = settings.mailcatcher_url
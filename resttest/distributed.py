@@ -0,0 +1,277 @@
+"""Distributed load execution: a coordinator hands a scenario to worker processes (local or on other hosts) and merges their latency histograms
+
+    python -m resttest.distributed coordinator tests.load:signup --local 4 --duration 30
+    python -m resttest.distributed worker coordinator-host:7400     # on every other load-generating host
+
+Messages are JSON objects, each prefixed with its length (4 bytes, big-endian).
+"""
+
+import argparse
+import importlib
+import json
+import socket
+import struct
+import subprocess
+import sys
+import threading
+from time import perf_counter
+from urllib.parse import urlsplit
+
+from resttest.histogram import Histogram
+from resttest.stats import observe
+
+_length = struct.Struct('>I')
+
+
+def send_message(sock, message):
+    data = json.dumps(message).encode()
+    sock.sendall(_length.pack(len(data)) + data)
+
+
+def _read_exactly(sock, size):
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError('Connection closed')
+        data += chunk
+    return data
+
+
+def receive_message(sock):
+    size, = _length.unpack(_read_exactly(sock, _length.size))
+    return json.loads(_read_exactly(sock, size))
+
+
+def load_scenario(name):
+    """Scenario function from its `module:function` name - called repeatedly with an HTTPSession"""
+    module_name, _, function_name = name.partition(':')
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+class Recorder:
+    """Latency histograms of requests (per method and path) and scenario iterations, collected since the last `take()`"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.histograms = {}
+        self.errors = {}
+
+    def _record(self, name, seconds):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.record(seconds)
+
+    def __call__(self, session, exchange):
+        with self._lock:
+            self._record(f'{exchange.method} {urlsplit(exchange.url).path}', exchange.seconds)
+
+    def iteration(self, seconds, error = None):
+        with self._lock:
+            self._record('iteration', seconds)
+            if error is not None:
+                name = type(error).__name__
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+    def take(self) -> dict:
+        with self._lock:
+            report = dict(histograms = {name: histogram.to_dict() for name, histogram in self.histograms.items()}, errors = self.errors)
+            self._reset()
+        return report
+
+
+def run_worker(scenario, duration = None, iterations = None, concurrency = 1, report = None, report_interval = 1.0, settings = None):
+    """Run `scenario` in `concurrency` threads until `duration` seconds or `iterations` iterations (per thread) pass.
+
+    `report(dict)` receives histograms recorded since the previous report every `report_interval` seconds, and once more at the end.
+    """
+    from resttest.http import HTTPSession
+
+    scenario = load_scenario(scenario) if isinstance(scenario, str) else scenario
+    recorder = Recorder()
+    stop = threading.Event()
+    deadline = perf_counter() + duration if duration else None
+
+    def run():
+        session = HTTPSession(**(settings or {}))
+        done = 0
+        while not stop.is_set() and (iterations is None or done < iterations) and (deadline is None or perf_counter() < deadline):
+            start = perf_counter()
+            error = None
+            try:
+                scenario(session)
+            except Exception as e:
+                error = e
+            recorder.iteration(perf_counter() - start, error)
+            done += 1
+
+    with observe(recorder):
+        threads = [threading.Thread(target = run, daemon = True) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(report_interval)
+                    if report is not None and thread.is_alive():
+                        report(recorder.take())
+        finally:
+            stop.set()
+
+    final = recorder.take()
+    if report is not None:
+        report(final)
+    return final
+
+
+def worker(address):
+    """Connect to the coordinator at `host:port`, run the scenario it sends and stream the results back."""
+    host, _, port = address.rpartition(':')
+    with socket.create_connection((host, int(port))) as sock:
+        send_message(sock, dict(type = 'hello', host = socket.gethostname()))
+        task = receive_message(sock)
+        lock = threading.Lock()
+
+        def report(data):
+            with lock:
+                send_message(sock, dict(type = 'report', **data))
+
+        try:
+            run_worker(task['scenario'], task.get('duration'), task.get('iterations'), task.get('concurrency', 1), report, task.get('report_interval', 1.0), task.get('settings'))
+        finally:
+            send_message(sock, dict(type = 'done'))
+
+
+class LoadResult:
+    """Histograms merged from all workers"""
+
+    def __init__(self):
+        self.histograms = {}
+        self.errors = {}
+        self.seconds = 0.0
+
+    def add(self, report):
+        for name, data in report['histograms'].items():
+            histogram = Histogram.from_dict(data)
+            if name in self.histograms:
+                self.histograms[name].merge(histogram)
+            else:
+                self.histograms[name] = histogram
+        for name, count in report['errors'].items():
+            self.errors[name] = self.errors.get(name, 0) + count
+
+    def summary(self) -> str:
+        lines = [f'{"count":>8} {"rps":>8} {"p50":>8} {"p90":>8} {"p99":>8} {"max":>8}  name']
+        for name, histogram in sorted(self.histograms.items()):
+            rps = histogram.count / self.seconds if self.seconds else 0.0
+            lines.append(f'{histogram.count:>8} {rps:>8.1f} {histogram.percentile(50):>8.4f} {histogram.percentile(90):>8.4f} {histogram.percentile(99):>8.4f} {(histogram.max or 0) / 1e6:>8.4f}  {name}')
+        for name, count in sorted(self.errors.items()):
+            lines.append(f'{count:>8} errors: {name}')
+        return '\n'.join(lines)
+
+
+class Coordinator:
+    """Hands a scenario to workers connecting over TCP and merges the histograms they stream back"""
+
+    def __init__(self, host = '127.0.0.1', port = 0):
+        # socket.create_server needs Python 3.8
+        self._server = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind((host, port))
+        self._server.listen()
+        self.host, self.port = self._server.getsockname()[:2]
+        self.processes = []
+
+    @property
+    def address(self):
+        return f'{self.host}:{self.port}'
+
+    def spawn_local(self, count):
+        """Start `count` worker processes on this machine."""
+        for _ in range(count):
+            self.processes.append(subprocess.Popen([sys.executable, '-m', 'resttest.distributed', 'worker', self.address]))
+
+    def run(self, scenario, workers, duration = None, iterations = None, concurrency = 1, report_interval = 1.0, settings = None, on_report = None) -> LoadResult:
+        """Wait for `workers` workers, run `scenario` (`module:function`) on all of them and return the merged result."""
+        connections = []
+        for _ in range(workers):
+            sock, _ = self._server.accept()
+            receive_message(sock)
+            connections.append(sock)
+
+        result = LoadResult()
+        lock = threading.Lock()
+        task = dict(type = 'run', scenario = scenario, duration = duration, iterations = iterations, concurrency = concurrency, report_interval = report_interval, settings = settings)
+
+        def collect(sock):
+            with sock:
+                while True:
+                    message = receive_message(sock)
+                    if message['type'] == 'done':
+                        return
+                    with lock:
+                        result.add(message)
+                        if on_report is not None:
+                            on_report(result)
+
+        start = perf_counter()
+        for sock in connections:
+            send_message(sock, task)
+        collectors = [threading.Thread(target = collect, args = (sock,)) for sock in connections]
+        for thread in collectors:
+            thread.start()
+        for thread in collectors:
+            thread.join()
+        result.seconds = perf_counter() - start
+        return result
+
+    def close(self):
+        self._server.close()
+        for process in self.processes:
+            process.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(prog = 'python -m resttest.distributed')
+    commands = parser.add_subparsers(dest = 'command', required = True)
+
+    coordinator = commands.add_parser('coordinator', help = 'run a scenario on workers and print merged latency percentiles')
+    coordinator.add_argument('scenario', help = 'module:function called repeatedly with an HTTPSession')
+    coordinator.add_argument('--host', default = '127.0.0.1')
+    coordinator.add_argument('--port', type = int, default = 7400)
+    coordinator.add_argument('--local', type = int, default = 1, help = 'worker processes to start on this machine')
+    coordinator.add_argument('--remote', type = int, default = 0, help = 'additional workers expected to connect from other hosts')
+    coordinator.add_argument('--concurrency', type = int, default = 1, help = 'threads per worker')
+    coordinator.add_argument('--duration', type = float, default = None)
+    coordinator.add_argument('--iterations', type = int, default = None, help = 'iterations per thread')
+
+    worker_command = commands.add_parser('worker', help = 'connect to a coordinator and run what it sends')
+    worker_command.add_argument('address', help = 'host:port of the coordinator')
+
+    args = parser.parse_args(argv)
+    if args.command == 'worker':
+        worker(args.address)
+        return
+
+    if args.duration is None and args.iterations is None:
+        parser.error('--duration or --iterations is required')
+
+    with Coordinator(args.host, args.port) as coordinator:
+        print(f'Coordinator listening on {coordinator.address}, waiting for {args.local + args.remote} workers')
+        coordinator.spawn_local(args.local)
+        result = coordinator.run(args.scenario, args.local + args.remote, args.duration, args.iterations, args.concurrency)
+    print(result.summary())
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,19 @@
 import importlib
 import pkgutil
+import sys
+
+if sys.argv[1:2] == ['--trace']:
+    from resttest.gendocs.trace import render_trace
+
+    render_trace(*sys.argv[2:])
+    sys.exit()
 
 import resttest
 from resttest.gendocs.generator import render_module
+from resttest.gendocs.renderer import SearchIndex
 
 resttest.BASE_URL = '/'
+index = SearchIndex()
 
 for module in pkgutil.iter_modules(['tests']):
     if not module.name.startswith('test_'):
@@ -16,4 +25,6 @@ for module in pkgutil.iter_modules(['tests']):
         print(f'{module.name}: {e}')
     else:
         if hasattr(mod, 'resttest'):
-            render_module(mod)
+            render_module(mod, index)
+
+index.save('docs/search-index.json')
@@ -1,11 +1,10 @@
-import typing
 from inspect import getsource
 
 import redbaron
 
 import resttest
 from resttest.gendocs.meta import *
-from resttest.gendocs.renderer import Renderer
+from resttest.gendocs.renderer import Renderer, test_name_to_title
 
 
 def atomtrailers(node):
@@ -270,7 +269,7 @@ class Context:
 def render_func(module, func):
     def_node = redbaron.RedBaron(getsource(func))[0]
 
-    hints = typing.get_type_hints(func)
+    hints = type_hints(func)
     args = {}
 
     for arg in def_node.arguments:
@@ -283,20 +282,13 @@ def render_func(module, func):
 renderer = None
 
 
-def test_name_to_title(name):
-    assert name.startswith('test_')
-    title = name[5:].replace('_', ' ')
-    title = title[0].upper() + title[1:]
-    return title
-
-
-def render_module(mod):
+def render_module(mod, index = None):
     global renderer
     mod_name = mod.__name__.split('.')[-1]
     print(mod_name)
     title = test_name_to_title(mod_name)
     output_file = f'docs/{mod_name[5:]}.md'
-    renderer = Renderer(title, output_file)
+    renderer = Renderer(title, output_file, index)
 
     Object = getattr(mod, 'Object', None)
     if Object:
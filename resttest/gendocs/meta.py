@@ -12,14 +12,32 @@ class Dummy:
 BoundMethod = type(Dummy().dummy)
 
 
-def property_type(cls, name):
+_type_hints_cache = {}
+_property_type_cache = {}
+
+
+def type_hints(obj):
+    """typing.get_type_hints, cached per class / function (bound methods share their function's entry)."""
+    key = getattr(obj, '__func__', obj)
+    try:
+        return _type_hints_cache[key]
+    except KeyError:
+        pass
+    except TypeError:
+        return typing.get_type_hints(key)
+
+    hints = _type_hints_cache[key] = typing.get_type_hints(key)
+    return hints
+
+
+def _property_type(cls, name):
     try:
-        return typing.get_type_hints(cls)[name]
+        return type_hints(cls)[name]
     except KeyError:
         static_property = getattr(cls, name)
 
         if isinstance(static_property, property):
-            return typing.get_type_hints(static_property.fget).get('return')
+            return type_hints(static_property.fget).get('return')
 
         if callable(static_property):
             return BoundMethod
@@ -27,9 +45,26 @@ def property_type(cls, name):
     raise AttributeError(name)
 
 
+def property_type(cls, name):
+    try:
+        result = _property_type_cache[cls, name]
+    except KeyError:
+        try:
+            result = _property_type(cls, name)
+        except AttributeError as e:
+            result = e
+        _property_type_cache[cls, name] = result
+    except TypeError:
+        return _property_type(cls, name)
+
+    if isinstance(result, AttributeError):
+        raise AttributeError(name)
+    return result
+
+
 def return_type(callable):
     try:
-        return typing.get_type_hints(callable)['return']
+        return type_hints(callable)['return']
     except KeyError:
         if isinstance(callable, type):
             return callable
@@ -52,6 +87,8 @@ def is_pure(callable):
 
 
 class BoundProperty:
+    __slots__ = ('__self__', '__attr__', 'var_name')
+
     def __init__(self, attr, obj):
         self.__self__ = obj
         self.__attr__ = attr
@@ -67,9 +104,11 @@ class BoundProperty:
 
 
 class Instance:
+    __slots__ = ('of', '_doc', 'var_name')
+
     def __init__(self, of, doc = None):
         self.of = of
-        self.__doc__ = doc
+        self._doc = doc
         self.var_name = None
 
     def __getattr__(self, attr):
@@ -104,6 +143,8 @@ class Instance:
 
 
 class IterableInstance(Instance):
+    __slots__ = ()
+
     def __init__(self, of, doc = None):
         super().__init__(of, doc)
 
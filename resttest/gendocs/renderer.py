@@ -1,20 +1,92 @@
+import io
 import json
+import os
+import re
+from urllib.parse import urlsplit
+
+
+def anchor(title):
+    """GitHub-style anchor of a Markdown header"""
+    return re.sub(r'[^\w\- ]', '', title.strip().lower()).replace(' ', '-')
+
+
+_id_segment = re.compile(r'\d+|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|[0-9a-f]{16,}|\{[^}]*\}', re.IGNORECASE)
+
+
+def endpoint(url):
+    """Templated path of a request URL: ids (numbers, UUIDs, f-string placeholders) become `{id}`, so /things/1/ and /things/999/ are one endpoint"""
+    text = str(url)
+    # Source of a symbolic f-string URL: f'/things/{thing.id}/'
+    quoted = re.fullmatch(r'[a-zA-Z]*([\'"])(.*)\1', text)
+    if quoted:
+        text = quoted.group(2)
+    return '/'.join('{id}' if _id_segment.fullmatch(segment) else segment for segment in urlsplit(text).path.split('/'))
+
+
+class SearchIndex:
+    """Inverted index of the generated docs: field (endpoint, method, object, property) -> value -> sections
+
+    Saved as compact JSON: {"sections": [[page, anchor, title], ...], "endpoint": {"/users/": [0, 4], ...}, ...}
+    """
+
+    fields = ('endpoint', 'method', 'object', 'property')
+
+    def __init__(self):
+        self.sections = []
+        self.terms = {field: {} for field in self.fields}
+
+    def add_section(self, page, title) -> int:
+        self.sections.append((page, anchor(title), title))
+        return len(self.sections) - 1
+
+    def add(self, section, field, value):
+        postings = self.terms[field].setdefault(str(value), [])
+        if not postings or postings[-1] != section:
+            postings.append(section)
+
+    def to_json(self) -> dict:
+        return dict(sections = self.sections, **self.terms)
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_json(), f, separators = (',', ':'))
 
 
 class Renderer:
-    def __init__(self, title, output_file):
+    """Markdown docs page
+
+    Arrays in examples are cut after `max_array_items` items. Examples longer than `collapse_lines` are collapsed into <details>, and those longer than `fragment_lines` are moved into separate files linked from the page.
+    """
+
+    def __init__(self, title, output_file, index = None, max_array_items = 10, collapse_lines = 30, fragment_lines = 500):
+        self.output_file = output_file
         self.out = open(output_file, 'w')
+        self.index = index
+        self.max_array_items = max_array_items
+        self.collapse_lines = collapse_lines
+        self.fragment_lines = fragment_lines
+        self.fragments = 0
+        self.section = None
         self.print(f'# {title}')
 
     def print(self, *args, **kwargs):
         print(*args, **kwargs, file = self.out)
 
+    def close(self):
+        self.out.close()
+
     def start_file(self, name):
         self.print(f"# {name}")
 
     def start_case(self, name):
         self.print()
         self.print(f'## {name}')
+        if self.index is not None:
+            self.section = self.index.add_section(os.path.basename(self.output_file), name)
+
+    def _index(self, field, value):
+        if self.index is not None and self.section is not None:
+            self.index.add(self.section, field, value)
 
     def write_text(self, text):
         self.print()
@@ -46,9 +118,11 @@ class Renderer:
 
     def _write_list(self, data, level = 0, newline_required = False):
         self.print()
-        for v in data:
+        for v in data[:self.max_array_items]:
             self.print('  ' * level + f'- ', end = '')
             self._write_value(v, level + 1)
+        if len(data) > self.max_array_items:
+            self.print('  ' * level + f'- ... ({len(data) - self.max_array_items} more)')
 
     def _string(self, value):
         if isinstance(value, str):
@@ -64,21 +138,55 @@ class Renderer:
         except:
             return f'<{value}>'
 
+    def _render_value(self, data) -> str:
+        out, self.out = self.out, io.StringIO()
+        try:
+            self._write_value(data)
+            return self.out.getvalue()
+        finally:
+            self.out = out
+
     def write_http_message(self, status_line, data):
+        body = self._render_value(data) if data else ''
+        lines = body.count('\n')
+
         self.print()
+        if lines > self.fragment_lines:
+            self.fragments += 1
+            fragment_file = f'{os.path.splitext(self.output_file)[0]}.example-{self.fragments}.md'
+            with open(fragment_file, 'w') as f:
+                f.write(f'```http\n{status_line}\n\n{body}```\n')
+            self.print('```http')
+            self.print(status_line)
+            self.print('```')
+            self.print(f'[Full example ({lines} lines)]({os.path.basename(fragment_file)})')
+            return
+
+        collapsed = lines > self.collapse_lines
+        if collapsed:
+            self.print(f'<details><summary>{status_line} ({lines} lines)</summary>')
+            self.print()
         self.print('```http')
         self.print(status_line)
         if data:
             self.print()
-            self._write_value(data)
+            self.print(body, end = '')
 
         self.print('```')
+        if collapsed:
+            self.print()
+            self.print('</details>')
 
     def write_http_request(self, method, url, data):
         if hasattr(data, '__resttest_plain__'):
             data = data.__dict__
         else:
             data = data
+        self._index('method', method)
+        self._index('endpoint', endpoint(url))
+        if isinstance(data, dict):
+            for name in data:
+                self._index('property', name)
         self.write_http_message(f'{method} {self._string(url)}', data)
 
     def write_http_response(self, response):
@@ -86,16 +194,37 @@ class Renderer:
 
     def write_object(self, object):
         schema = object.__resttest_schema__
-        self.start_case(f'The {schema.title} object')
-        self.print(getattr(schema, 'description', ''))
+        rows = [(prop_name, get_nice_type(prop_schema), getattr(prop_schema, "description", "")) for prop_name, prop_schema in schema.properties.items()]
+        self.write_object_table(schema.title, getattr(schema, 'description', ''), rows)
+
+    def write_object_table(self, title, description, rows):
+        self.start_case(f'The {title} object')
+        self._index('object', title)
+        for prop_name, _, _ in rows:
+            self._index('property', prop_name)
+        self.print(description)
         self.print()
 
         self.print('### Properties')
         self.print('Name | Type | Description')
         self.print('- | - | -')
-        for prop_name, prop_schema in schema.properties.items():
-            prop_type = get_nice_type(prop_schema)
-            self.print(f'{prop_name} | {prop_type} | {getattr(prop_schema, "description", "")}')
+        for prop_name, prop_type, prop_description in rows:
+            self.print(f'{prop_name} | {prop_type} | {prop_description}')
+
+
+def strip_test_affix(name):
+    """Name of a test module / function without its `test_` prefix or `_test` suffix"""
+    if name.startswith('test_'):
+        return name[5:]
+    if name.endswith('_test'):
+        return name[:-5]
+    return name
+
+
+def test_name_to_title(name):
+    title = strip_test_affix(name).replace('_', ' ')
+    title = title[0].upper() + title[1:]
+    return title
 
 
 def get_nice_type(schema):
@@ -103,9 +232,8 @@ def get_nice_type(schema):
 
     ref = getattr(schema, '$ref', undefined)
     if ref is not undefined:
-        assert ref.startswith('#/definitions/')
-        def_name = ref[len('#/definitions/'):]
-        return def_name
+        # other.yaml#/definitions/Name -> Name
+        return ref.rsplit('/', 1)[-1] or ref
 
     const = getattr(schema, 'const', undefined)
     if const is not undefined:
@@ -0,0 +1,249 @@
+import functools
+import json
+import os
+import sys
+from contextlib import contextmanager
+from inspect import getsourcelines
+
+from resttest.gendocs.renderer import Renderer, SearchIndex, get_nice_type, strip_test_affix, test_name_to_title
+from resttest.http import HTTPResponse, HTTPSession
+from resttest.pipe import matches
+from resttest.schema import SchemalessObject, serialize
+
+
+def _plain(value):
+    if isinstance(value, SchemalessObject):
+        return _plain(value._data)
+    if isinstance(value, dict):
+        return {str(k): _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if value is ...:
+        return {'$repr': '...'}
+    if isinstance(value, HTTPResponse):
+        return {'$response': [value.code, value.reason, _plain(value.data)]}
+    if isinstance(value, matches):
+        return _plain(value.pattern)
+    try:
+        return serialize(value)
+    except ValueError:
+        pass
+    try:
+        return _plain(serialize(value.__dict__))
+    except (AttributeError, ValueError):
+        return {'$repr': str(getattr(value, 'pattern', value))}
+
+
+def _comment_text(line):
+    line = line.strip()
+    if line.startswith('# resttest.'):
+        return None
+    if line.startswith('##'):
+        return line
+    return line[1:].lstrip()
+
+
+class Tracer:
+    """Records requests, responses and test comments of a real test run into an NDJSON trace file"""
+
+    def __init__(self, path, base_url = None):
+        self.out = open(path, 'w')
+        self.base_url = base_url
+        self._modules = set()
+        self._case_code = None
+        self._comments = []
+        self._pending_response = None
+        self._last_response = None
+        self._originals = None
+
+    def _emit(self, **record):
+        self.out.write(json.dumps(record, separators = (',', ':')))
+        self.out.write('\n')
+
+    def install(self):
+        tracer = self
+        request = HTTPSession.request
+        matches_call = matches.__call__
+
+        @functools.wraps(request)
+        def traced_request(session, method, url, data = None, *args, **kwargs):
+            tracer._request(session, method, url, data)
+            try:
+                response = request(session, method, url, data, *args, **kwargs)
+            except HTTPResponse as e:
+                tracer._response(e)
+                raise
+            tracer._response(response)
+            return response
+
+        @functools.wraps(matches_call)
+        def traced_matches(self, value):
+            result = matches_call(self, value)
+            tracer._assertion(self.pattern, value)
+            return result
+
+        self._originals = request, matches_call
+        HTTPSession.request = traced_request
+        matches.__call__ = traced_matches
+
+    def uninstall(self):
+        if self._originals:
+            HTTPSession.request, matches.__call__ = self._originals
+            self._originals = None
+
+    def close(self):
+        self.uninstall()
+        self.out.close()
+
+    def _module(self, module):
+        name = module.__name__.split('.')[-1]
+        if name in self._modules:
+            return name
+        self._modules.add(name)
+
+        record = dict(module = name, title = test_name_to_title(name))
+        Object = getattr(module, 'Object', None)
+        if Object is not None and hasattr(Object, '__resttest_schema__'):
+            schema = Object.__resttest_schema__
+            rows = [[prop_name, get_nice_type(prop_schema), getattr(prop_schema, 'description', '')] for prop_name, prop_schema in schema.properties.items()]
+            record['object'] = dict(title = schema.title, description = getattr(schema, 'description', ''), rows = rows)
+        self._emit(**record)
+        return name
+
+    @contextmanager
+    def case(self, module, func):
+        module_name = self._module(module)
+        index = list(vars(module)).index(func.__name__) if func.__name__ in vars(module) else 0
+        self._emit(case = test_name_to_title(func.__name__), module = module_name, index = index)
+
+        lines, start = getsourcelines(func)
+        self._comments = [(start + i, text) for i, line in enumerate(lines) if line.lstrip().startswith('#') for text in [_comment_text(line)] if text is not None]
+        self._case_code = func.__code__
+        try:
+            yield
+        finally:
+            self._flush_response()
+            self._flush_comments(sys.maxsize)
+            self._case_code = None
+            self._last_response = None
+
+    def _current_line(self):
+        frame = sys._getframe(2)
+        while frame is not None:
+            if frame.f_code is self._case_code:
+                return frame.f_lineno
+            frame = frame.f_back
+        return None
+
+    def _flush_comments(self, before_line):
+        while self._comments and self._comments[0][0] < before_line:
+            _, text = self._comments.pop(0)
+            self._emit(text = text)
+
+    def _flush_response(self):
+        if self._pending_response is not None:
+            self._emit(response = self._pending_response)
+            self._pending_response = None
+
+    def _display_url(self, session, url):
+        base_url = self.base_url or session.settings.base_url
+        if url.startswith(base_url):
+            return '/' + url[len(base_url):]
+        return url
+
+    def _request(self, session, method, url, data):
+        if self._case_code is None:
+            return
+        self._flush_response()
+        line = self._current_line()
+        if line is not None:
+            self._flush_comments(line)
+        self._emit(request = [method, self._display_url(session, session.url(url)), _plain(data) if data is not None else None])
+
+    def _response(self, response):
+        if self._case_code is None:
+            return
+        self._last_response = response
+        self._pending_response = [response.code, response.reason, _plain(response.data)]
+
+    def _assertion(self, pattern, value):
+        """Document the asserted pattern instead of the raw response, like the symbolic generator does."""
+        response = self._last_response
+        if self._pending_response is None or response is None:
+            return
+        if value is response and isinstance(pattern, HTTPResponse):
+            self._pending_response = [pattern.code, pattern.reason, _plain(pattern.data)]
+        elif value is response.data:
+            self._pending_response[2] = _plain(pattern)
+
+
+class _Repr:
+    def __init__(self, text):
+        self.text = text
+
+    def __str__(self):
+        return self.text
+
+
+class _Response:
+    def __init__(self, code, reason, data):
+        self.code = code
+        self.reason = reason
+        self.data = data
+
+
+def _restore(value):
+    if isinstance(value, dict):
+        if len(value) == 1 and '$repr' in value:
+            return ... if value['$repr'] == '...' else _Repr(value['$repr'])
+        if len(value) == 1 and '$response' in value:
+            return _Response(*_restore(value['$response']))
+        return {k: _restore(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_restore(v) for v in value]
+    return value
+
+
+def read_trace(*paths):
+    """Group trace records by module and test case - trace files of several xdist workers can be merged."""
+    modules = {}
+    for path in paths:
+        with open(path) as f:
+            events = None
+            for line in f:
+                record = json.loads(line)
+                if 'module' in record and 'case' not in record:
+                    modules.setdefault(record['module'], dict(meta = record, cases = []))
+                elif 'case' in record:
+                    events = []
+                    modules[record['module']]['cases'].append((record['index'], record['case'], events))
+                else:
+                    events.append(record)
+    return modules
+
+
+def render_trace(*paths, output_dir = 'docs'):
+    os.makedirs(output_dir, exist_ok = True)
+    index = SearchIndex()
+    for name, module in read_trace(*paths).items():
+        meta = module['meta']
+        renderer = Renderer(meta['title'], os.path.join(output_dir, f'{strip_test_affix(name)}.md'), index)
+
+        object = meta.get('object')
+        if object:
+            renderer.write_object_table(object['title'], object['description'], object['rows'])
+
+        for _, title, events in sorted(module['cases'], key = lambda case: case[0]):
+            renderer.start_case(title)
+            for event in events:
+                if 'text' in event:
+                    renderer.write_text(event['text'])
+                elif 'request' in event:
+                    method, url, data = event['request']
+                    renderer.write_http_request(method, url, _restore(data))
+                elif 'response' in event:
+                    renderer.write_http_response(_Response(*_restore(event['response'])))
+
+        renderer.close()
+
+    index.save(os.path.join(output_dir, 'search-index.json'))
@@ -0,0 +1,523 @@
+import collections.abc
+import json
+import math
+import random
+import re
+import string
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Union
+
+from typing_extensions import Literal
+
+_EPOCH = datetime(2000, 1, 1, tzinfo = timezone.utc)
+
+# Keywords the generator cannot satisfy by construction - data generated for such schemas would not validate.
+_UNSUPPORTED = ('allOf', 'oneOf', 'not', 'if', 'contains', 'propertyNames', 'minProperties', 'maxProperties', 'dependencies', 'patternProperties')
+
+_ATTEMPTS = 100
+
+
+def _schema_value(schema, name, default = None):
+    if schema is None:
+        return default
+    if isinstance(schema, dict):
+        return schema.get(name, default)
+    return getattr(schema, name, default)
+
+
+def _resolve(schema, document):
+    """Follow `$ref`s of `schema` - returns (schema, document it belongs to)."""
+    while document is not None and _schema_value(schema, '$ref') is not None:
+        document, schema = document.resolve_document(_schema_value(schema, '$ref'))
+    return schema, document
+
+
+def _check_supported(schema):
+    for keyword in _UNSUPPORTED:
+        if _schema_value(schema, keyword) is not None:
+            raise ValueError(f'Cannot generate data for schemas using {keyword}: {schema}')
+
+
+_printable = string.ascii_letters + string.digits + string.punctuation + ' '
+
+_escapes = {
+    'd': string.digits,
+    'D': string.ascii_letters + string.punctuation + ' ',
+    'w': string.ascii_letters + string.digits + '_',
+    'W': string.punctuation.replace('_', '') + ' ',
+    's': ' \t',
+    'S': string.ascii_letters + string.digits + string.punctuation,
+    'n': '\n',
+    'r': '\r',
+    't': '\t',
+    'f': '\f',
+    'v': '\v',
+}
+
+_quantifier = re.compile(r'\{(\d+)(,?)(\d*)\}')
+
+
+class _Regex:
+    """Generator of strings matching a regex
+
+    Supports literals, escapes, `.`, character classes, groups, alternation and quantifiers - JSON Schema patterns rarely need more.
+    Anything else (backreferences, lookarounds, word boundaries) raises ValueError.
+    """
+
+    def __init__(self, pattern, rng, max_repeat = 8):
+        self.pattern = pattern
+        self.rng = rng
+        self.max_repeat = max_repeat
+        self.pos = 0
+
+    def compile(self):
+        generate = self._alternation()
+        if self.pos != len(self.pattern):
+            self._unsupported()
+        return generate
+
+    def _unsupported(self):
+        raise ValueError(f'Cannot generate strings matching {self.pattern!r} (at position {self.pos})')
+
+    def _peek(self):
+        return self.pattern[self.pos] if self.pos < len(self.pattern) else None
+
+    def _next(self):
+        char = self._peek()
+        if char is None:
+            self._unsupported()
+        self.pos += 1
+        return char
+
+    def _alternation(self):
+        branches = [self._sequence()]
+        while self._peek() == '|':
+            self.pos += 1
+            branches.append(self._sequence())
+        if len(branches) == 1:
+            return branches[0]
+        choice = self.rng.choice
+        return lambda: choice(branches)()
+
+    def _sequence(self):
+        parts = []
+        while self._peek() not in (None, '|', ')'):
+            parts.append(self._repeat(self._atom()))
+        return lambda: ''.join(part() for part in parts)
+
+    def _atom(self):
+        char = self._next()
+        if char == '(':
+            if self.pattern.startswith('?:', self.pos):
+                self.pos += 2
+            elif self._peek() == '?':
+                self._unsupported()
+            inner = self._alternation()
+            if self._next() != ')':
+                self._unsupported()
+            return inner
+        if char == '[':
+            return self._chars(self._class())
+        if char == '.':
+            return self._chars(_printable)
+        if char in '^$':
+            return lambda: ''
+        if char == '\\':
+            return self._chars(self._escape())
+        if char in '*+?)':
+            self._unsupported()
+        return lambda: char
+
+    def _chars(self, chars):
+        choice = self.rng.choice
+        return lambda: choice(chars)
+
+    def _escape(self):
+        char = self._next()
+        if char in _escapes:
+            return _escapes[char]
+        if char.isalnum():
+            # Backreferences, \b, \A, \uXXXX, ...
+            self.pos -= 1
+            self._unsupported()
+        return char
+
+    def _class(self):
+        negate = self._peek() == '^'
+        if negate:
+            self.pos += 1
+        chars = set()
+        first = True
+        while first or self._peek() != ']':
+            first = False
+            char = self._next()
+            if char == '\\':
+                char = self._escape()
+                if len(char) > 1:
+                    chars.update(char)
+                    continue
+            if self._peek() == '-' and self.pattern[self.pos + 1:self.pos + 2] not in ('', ']'):
+                self.pos += 1
+                end = self._next()
+                if end == '\\':
+                    end = self._escape()
+                chars.update(chr(code) for code in range(ord(char), ord(end) + 1))
+            else:
+                chars.add(char)
+        self.pos += 1
+        if negate:
+            chars = set(_printable) - chars
+        if not chars:
+            self._unsupported()
+        return ''.join(sorted(chars))
+
+    def _repeat(self, atom):
+        char = self._peek()
+        if char == '*':
+            low, high = 0, None
+        elif char == '+':
+            low, high = 1, None
+        elif char == '?':
+            low, high = 0, 1
+        elif char == '{' and _quantifier.match(self.pattern, self.pos):
+            match = _quantifier.match(self.pattern, self.pos)
+            low = int(match.group(1))
+            high = low if not match.group(2) else int(match.group(3)) if match.group(3) else None
+            self.pos = match.end() - 1
+        else:
+            return atom
+        self.pos += 1
+        if self._peek() in ('?', '+'):
+            # Lazy / possessive quantifiers match the same strings.
+            self.pos += 1
+
+        high = low + self.max_repeat if high is None else high
+        randint = self.rng.randint
+        return lambda: ''.join(atom() for _ in range(randint(low, high)))
+
+
+def _freeze(value):
+    return json.dumps(value, sort_keys = True)
+
+
+class PayloadGenerator:
+    """Fast, deterministic generator of valid data for the types produced by SchemaDocument.to_type
+
+    Data is generated in its JSON form (as sent over the wire) - use unserialize() to get objects.
+    With `validate` (the default), generate / batch / write_ndjson check the data against the schemas of the generated objects.
+    """
+
+    def __init__(self, seed = 0, max_items = 5, max_depth = 4, optional_probability = 0.5, validate = True):
+        self.random = random.Random(seed)
+        self.max_items = max_items
+        self.max_depth = max_depth
+        self.optional_probability = optional_probability
+        self.validate = validate
+        self._compiled = {}
+
+    def compile(self, Type, schema = None, document = None):
+        """Function generating data of the given type (`generate(depth = 0)`), compiled once per type."""
+        schema, document = _resolve(schema, document)
+        key = (Type, id(schema))
+        try:
+            return self._compiled[key]
+        except KeyError:
+            pass
+
+        generate = self._compiled[key] = self._compile(Type, schema, document)
+        return generate
+
+    def _compile(self, Type, schema, document):
+        rng = self.random
+        if schema is not None:
+            _check_supported(schema)
+
+        enum = _schema_value(schema, 'enum')
+        if enum is not None:
+            choices = list(enum)
+            return lambda depth = 0: rng.choice(choices)
+
+        if Type is type(None):
+            return lambda depth = 0: None
+
+        if getattr(Type, '__origin__', None) == Literal:
+            choices = list(Type.__args__)
+            return lambda depth = 0: rng.choice(choices)
+
+        if Type is bool:
+            return lambda depth = 0: rng.random() < 0.5
+
+        if Type is int:
+            return self._integer(schema)
+
+        if Type is float:
+            return self._number(schema)
+
+        if Type is str:
+            return self._string(schema)
+
+        if Type is datetime:
+            span = 20 * 365 * 86400
+
+            def generate(depth = 0):
+                return (_EPOCH + timedelta(seconds = rng.randrange(span))).isoformat().replace('+00:00', 'Z')
+
+            return generate
+
+        if getattr(Type, '__resttest_plain__', False):
+            return self._object(Type)
+
+        origin = getattr(Type, '__origin__', None)
+
+        any_of = _schema_value(schema, 'anyOf')
+        if origin == Union or any_of is not None:
+            members = self._members(Type, schema, document)
+            options = [self.compile(arg, member_schema, document) for arg, member_schema in members]
+            simple = [option for (arg, _), option in zip(members, options) if not getattr(arg, '__resttest_plain__', False) and getattr(arg, '__origin__', None) is None] or options
+
+            def generate(depth = 0):
+                return rng.choice(options if depth < self.max_depth else simple)(depth)
+
+            return generate
+
+        if origin in (collections.abc.Sequence, list):
+            generate_item = self.compile(Type.__args__[0], _schema_value(schema, 'items'), document)
+            return self._array(generate_item, schema)
+
+        if origin in (collections.abc.Mapping, dict):
+            generate_value = self.compile(Type.__args__[1], _schema_value(schema, 'additionalProperties'), document)
+            generate_key = self._string(None)
+
+            def generate(depth = 0):
+                if depth >= self.max_depth:
+                    return {}
+                return {generate_key(): generate_value(depth + 1) for _ in range(rng.randint(0, self.max_items))}
+
+            return generate
+
+        if Type is dict:
+            return lambda depth = 0: {}
+
+        if Type is list:
+            return lambda depth = 0: []
+
+        if Type is Any or Type is object:
+            return lambda depth = 0: None
+
+        raise ValueError(Type)
+
+    def _members(self, Type, schema, document):
+        """(type, schema) of every member of a Union - anyOf branches, or the types of `type: [string, null]` sharing its schema"""
+        any_of = _schema_value(schema, 'anyOf')
+        if any_of is None:
+            return [(arg, schema) for arg in Type.__args__]
+        if document is not None:
+            # Union drops duplicate types, so the branches are matched with their own types rather than with Type.__args__.
+            return [(document.to_type(member_schema), member_schema) for member_schema in any_of]
+        args = Type.__args__ if getattr(Type, '__origin__', None) == Union else (Type,)
+        if len(args) != len(any_of):
+            raise ValueError(f'Cannot match the anyOf branches of {schema} with {Type}')
+        return list(zip(args, any_of))
+
+    def _integer(self, schema):
+        rng = self.random
+        low = _schema_value(schema, 'minimum')
+        high = _schema_value(schema, 'maximum')
+        exclusive_low = _schema_value(schema, 'exclusiveMinimum')
+        exclusive_high = _schema_value(schema, 'exclusiveMaximum')
+        if exclusive_low is not None:
+            low = max(low, math.floor(exclusive_low) + 1) if low is not None else math.floor(exclusive_low) + 1
+        if exclusive_high is not None:
+            high = min(high, math.ceil(exclusive_high) - 1) if high is not None else math.ceil(exclusive_high) - 1
+        low = math.ceil(low) if low is not None else None
+        high = math.floor(high) if high is not None else None
+        if low is None:
+            low = 0 if high is None or high >= 0 else high - 1000000
+        if high is None:
+            high = low + 1000000
+
+        step = _schema_value(schema, 'multipleOf')
+        if step is not None:
+            if not float(step).is_integer() and not (1 / step).is_integer():
+                raise ValueError(f'Cannot generate integers that are multiples of {step}')
+            step = int(step) if float(step).is_integer() else 1
+            first, last = math.ceil(low / step), math.floor(high / step)
+            if first > last:
+                raise ValueError(f'No multiple of {step} between {low} and {high}')
+            return lambda depth = 0: rng.randint(first, last) * step
+
+        if low > high:
+            raise ValueError(f'No integer between {low} and {high}')
+        return lambda depth = 0: rng.randint(low, high)
+
+    def _number(self, schema):
+        rng = self.random
+        exclusive_low = _schema_value(schema, 'exclusiveMinimum')
+        exclusive_high = _schema_value(schema, 'exclusiveMaximum')
+        low = _schema_value(schema, 'minimum', exclusive_low)
+        high = _schema_value(schema, 'maximum', exclusive_high)
+        if low is None:
+            low = 0.0 if high is None or high >= 0 else high - 1000.0
+        if high is None:
+            high = low + 1000.0
+
+        def allowed(value):
+            return low <= value <= high and (exclusive_low is None or value > exclusive_low) and (exclusive_high is None or value < exclusive_high)
+
+        step = _schema_value(schema, 'multipleOf')
+        if step is not None:
+            first, last = math.ceil(low / step), math.floor(high / step)
+            multiples = [k for k in (first, first + 1, last - 1, last) if first <= k <= last and allowed(k * step)]
+            if not multiples:
+                raise ValueError(f'No multiple of {step} between {low} and {high}')
+
+            def generate(depth = 0):
+                value = rng.randint(first, last) * step
+                return value if allowed(value) else rng.choice(multiples) * step
+
+            return generate
+
+        def generate(depth = 0):
+            value = rng.uniform(low, high)
+            return value if allowed(value) else (low + high) / 2
+
+        return generate
+
+    def _string(self, schema):
+        rng = self.random
+        max_length = _schema_value(schema, 'maxLength')
+        min_length = _schema_value(schema, 'minLength', min(1, max_length) if max_length is not None else 1)
+
+        pattern = _schema_value(schema, 'pattern')
+        if pattern is not None:
+            generate_match = _Regex(pattern, rng).compile()
+
+            def generate(depth = 0):
+                for _ in range(_ATTEMPTS):
+                    value = generate_match()
+                    if len(value) >= min_length and (max_length is None or len(value) <= max_length):
+                        return value
+                raise ValueError(f'Cannot generate a string matching {pattern!r} of length {min_length}..{max_length}')
+
+            return generate
+
+        format = _schema_value(schema, 'format')
+        if format == 'uuid':
+            return lambda depth = 0: str(uuid.UUID(int = rng.getrandbits(128), version = 4))
+        if format == 'email':
+            return lambda depth = 0: ''.join(rng.choices(string.ascii_lowercase, k = 10)) + '@example.com'
+        if format in ('uri', 'uri-reference'):
+            return lambda depth = 0: 'https://example.com/' + ''.join(rng.choices(string.ascii_lowercase, k = 10))
+        if format == 'date':
+            return lambda depth = 0: (_EPOCH + timedelta(days = rng.randrange(7300))).date().isoformat()
+
+        if max_length is None:
+            max_length = max(min_length, 16)
+        alphabet = string.ascii_letters + string.digits
+        return lambda depth = 0: ''.join(rng.choices(alphabet, k = rng.randint(min_length, max_length)))
+
+    def _array(self, generate_item, schema):
+        rng = self.random
+        min_items = _schema_value(schema, 'minItems', 0)
+        max_items = _schema_value(schema, 'maxItems', max(min_items, self.max_items))
+        unique = _schema_value(schema, 'uniqueItems', False)
+
+        def generate(depth = 0):
+            count = min_items if depth >= self.max_depth else rng.randint(min_items, max_items)
+            if not unique:
+                return [generate_item(depth + 1) for _ in range(count)]
+
+            items = {}
+            for _ in range(count * _ATTEMPTS):
+                if len(items) == count:
+                    break
+                item = generate_item(depth + 1)
+                items.setdefault(_freeze(item), item)
+            if len(items) < min_items:
+                raise ValueError(f'Cannot generate {min_items} unique items')
+            return list(items.values())
+
+        return generate
+
+    def _object(self, Object):
+        rng = self.random
+        schema = Object.__resttest_schema__
+        document = getattr(Object, '__resttest_document__', None)
+        properties = getattr(schema, 'properties', {})
+        if not isinstance(properties, dict):
+            properties = properties._data
+
+        required = []
+        optional = []
+        for name, prop_type in Object.__annotations__.items():
+            generate = self.compile(prop_type, properties.get(name), document)
+            (optional if name in Object.__dict__ else required).append((name, generate))
+
+        probability = self.optional_probability
+
+        def generate(depth = 0):
+            data = {name: generate_property(depth + 1) for name, generate_property in required}
+            for name, generate_property in optional:
+                if rng.random() < probability:
+                    data[name] = generate_property(depth + 1)
+            return data
+
+        return generate
+
+    def check(self, Type, data):
+        """Validate generated data against the schemas of the objects it contains - raises ValidationError."""
+        if getattr(Type, '__resttest_plain__', False):
+            Type.__resttest_validator__(data)
+            return
+
+        origin = getattr(Type, '__origin__', None)
+        if origin == Union:
+            error = None
+            for arg in Type.__args__:
+                try:
+                    self.check(arg, data)
+                    return
+                except ValueError as e:
+                    error = e
+            if error is not None:
+                raise error
+        elif origin in (collections.abc.Sequence, list) and isinstance(data, list):
+            for item in data:
+                self.check(Type.__args__[0], item)
+        elif origin in (collections.abc.Mapping, dict) and isinstance(data, dict):
+            for value in data.values():
+                self.check(Type.__args__[1], value)
+
+    def _checked(self, Type):
+        generate = self.compile(Type)
+        if not self.validate:
+            return generate
+
+        def checked():
+            data = generate()
+            self.check(Type, data)
+            return data
+
+        return checked
+
+    def generate(self, Type):
+        return self._checked(Type)()
+
+    def batch(self, Type, count) -> list:
+        generate = self._checked(Type)
+        return [generate() for _ in range(count)]
+
+    def write_ndjson(self, path, Type, count, chunk_size = 1000):
+        """Stream `count` generated items into an NDJSON file, one item per line."""
+        generate = self._checked(Type)
+        dumps = json.JSONEncoder(separators = (',', ':')).encode
+        with open(path, 'w') as f:
+            for start in range(0, count, chunk_size):
+                f.write(''.join(dumps(generate()) + '\n' for _ in range(min(chunk_size, count - start))))
+
+
+def read_ndjson(path):
+    with open(path) as f:
+        for line in f:
+            yield json.loads(line)
@@ -0,0 +1,84 @@
+import math
+
+
+class Histogram:
+    """HDR-style latency histogram: log-linear buckets of microseconds, ~1% relative error, mergeable
+
+    Values below 2**bits µs are stored exactly; above that every power of two is split into 2**(bits - 1) buckets.
+    Counts are sparse, so histograms are cheap to send over the wire and merging them gives exact aggregate percentiles (up to the bucket precision).
+    """
+
+    def __init__(self, bits = 7):
+        self.bits = bits
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _bucket(self, value):
+        if value < 1 << self.bits:
+            return value
+        exponent = value.bit_length() - self.bits
+        return (exponent << (self.bits - 1)) + (value >> exponent)
+
+    def _value(self, bucket):
+        if bucket < 1 << self.bits:
+            return bucket
+        half = 1 << (self.bits - 1)
+        exponent = bucket // half - 1
+        mantissa = bucket - exponent * half
+        return (mantissa << exponent) + (1 << (exponent - 1))
+
+    def record(self, seconds, count = 1):
+        value = max(0, int(seconds * 1e6))
+        bucket = self._bucket(value)
+        self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.count += count
+        self.total += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: 'Histogram') -> 'Histogram':
+        if other.bits != self.bits:
+            raise ValueError('Cannot merge histograms of different precision')
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        return self
+
+    def percentile(self, percent) -> float:
+        """Value (in seconds) below which `percent`% of the recorded values fall"""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * percent / 100))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return min(max(self._value(bucket), self.min), self.max) / 1e6
+        return self.max / 1e6
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count / 1e6 if self.count else 0.0
+
+    def to_dict(self) -> dict:
+        return dict(bits = self.bits, counts = [[bucket, count] for bucket, count in self.counts.items()], count = self.count, total = self.total, min = self.min, max = self.max)
+
+    @classmethod
+    def from_dict(cls, data) -> 'Histogram':
+        histogram = cls(data['bits'])
+        histogram.counts = {bucket: count for bucket, count in data['counts']}
+        histogram.count = data['count']
+        histogram.total = data['total']
+        histogram.min = data['min']
+        histogram.max = data['max']
+        return histogram
+
+    def __repr__(self):
+        return f'Histogram(count = {self.count}, p50 = {self.percentile(50):.6f}, p99 = {self.percentile(99):.6f}, max = {(self.max or 0) / 1e6:.6f})'
@@ -1,17 +1,54 @@
-import json
-from datetime import datetime
+import asyncio
+import threading
+import typing
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from http import HTTPStatus
+from time import perf_counter, sleep
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
 
 import requests
-
+from requests.adapters import HTTPAdapter
+
+from resttest import conf
+from resttest.cache import CacheEntry, ResponseCache
+from resttest.codec import get_codec
+from resttest.compression import accept_encoding, get_compressor
+from resttest.prefetch import prefetched
+from resttest.retry import Retry, shared_bucket
 from resttest.schema import make_schemaless_object, serialize, unserialize
+from resttest.stats import Exchange, notify
+from resttest.streaming import decode_events, ndjson_events, sse_events
 
 
 class HTTPResponse(Exception):
     """HTTP response"""
 
+    _decode = None
+
     def __init__(self, data):
         self.data = data
 
+    @classmethod
+    def deferred(cls, content, decode) -> 'HTTPResponse':
+        """Response whose data is decoded from `content` only when first accessed"""
+        response = cls.__new__(cls)
+        response._data = content
+        response._decode = decode
+        return response
+
+    @property
+    def data(self):
+        if self._decode is not None:
+            self._data = self._decode(self._data)
+            self._decode = None
+        return self._data
+
+    @data.setter
+    def data(self, data):
+        self._data = data
+        self._decode = None
+
 
 class HTTP200_OK(HTTPResponse):
     code = 200
@@ -100,7 +137,15 @@ class HTTP409_Conflict(HTTPResponse):
     reason = 'Conflict'
 
 
-Conflict = HTTP405_MethodNotAllowed
+Conflict = HTTP409_Conflict
+
+
+class HTTP429_TooManyRequests(HTTPResponse):
+    code = 429
+    reason = 'Too Many Requests'
+
+
+TooManyRequests = HTTP429_TooManyRequests
 
 
 class HTTP500_InternalServerError(HTTPResponse):
@@ -118,6 +163,30 @@ class HTTP501_NotImplemented(HTTPResponse):
 
 NotImplemented = HTTP501_NotImplemented
 
+
+class HTTP502_BadGateway(HTTPResponse):
+    code = 502
+    reason = 'Bad Gateway'
+
+
+BadGateway = HTTP502_BadGateway
+
+
+class HTTP503_ServiceUnavailable(HTTPResponse):
+    code = 503
+    reason = 'Service Unavailable'
+
+
+ServiceUnavailable = HTTP503_ServiceUnavailable
+
+
+class HTTP504_GatewayTimeout(HTTPResponse):
+    code = 504
+    reason = 'Gateway Timeout'
+
+
+GatewayTimeout = HTTP504_GatewayTimeout
+
 responses = {
     200: HTTP200_OK,
     201: HTTP201_Created,
@@ -129,14 +198,55 @@ responses = {
     404: HTTP404_NotFound,
     405: HTTP405_MethodNotAllowed,
     409: HTTP409_Conflict,
+    429: HTTP429_TooManyRequests,
     500: HTTP500_InternalServerError,
     501: HTTP501_NotImplemented,
+    502: HTTP502_BadGateway,
+    503: HTTP503_ServiceUnavailable,
+    504: HTTP504_GatewayTimeout,
 }
 
 
+def response_class(code):
+    """HTTPResponse subclass for the given status code, created on the fly for codes without a predefined class."""
+    try:
+        return responses[code]
+    except KeyError:
+        try:
+            reason = HTTPStatus(code).phrase
+        except ValueError:
+            reason = 'Unknown'
+        cls = type(f'HTTP{code}_{"".join(c for c in reason if c.isalnum())}', (HTTPResponse,), dict(code = code, reason = reason))
+        return responses.setdefault(code, cls)
+
+
+def _with_params(url, params):
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query, keep_blank_values = True))
+    query.update({k: str(v) for k, v in params.items()})
+    return urlunsplit(parts._replace(query = urlencode(query)))
+
+
 class HTTPSession:
-    def __init__(self):
+    default_adapter = None
+
+    # Headers carrying credentials - the only ones saved by snapshot(), besides cookies.
+    auth_headers = frozenset({'authorization', 'proxy-authorization', 'cookie', 'x-api-key', 'x-auth-token', 'x-csrftoken', 'x-csrf-token', 'x-xsrf-token'})
+
+    def __init__(self, settings = None, adapter = None, retry = None, rate_limiter = None, cache = None, **overrides):
+        self.settings = (settings or conf.settings).replace(**overrides)
+        self.cache = cache or (ResponseCache(self.settings.response_cache_bytes) if self.settings.response_cache_bytes else None)
+        self.retry = retry or Retry(attempts = self.settings.retries)
+        self.rate_limiter = rate_limiter or (shared_bucket(self.settings.rate_limit) if self.settings.rate_limit else None)
+        self._codec = get_codec(self.settings.codec)
+        self._compress = get_compressor(self.settings.compression) if self.settings.compression else None
+        self._semaphore = threading.BoundedSemaphore(self.settings.max_concurrency)
+
         self._requests_session = requests.Session()
+        adapter = adapter or self.default_adapter or HTTPAdapter(pool_connections = self.settings.pool_connections, pool_maxsize = self.settings.pool_maxsize)
+        self._requests_session.mount('http://', adapter)
+        self._requests_session.mount('https://', adapter)
+        self._requests_session.headers['Accept-Encoding'] = self.settings.accept_encoding or accept_encoding()
 
     @property
     def headers(self):
@@ -146,43 +256,260 @@ class HTTPSession:
     def cookies(self):
         return self._requests_session.cookies
 
-    def request(self, method, url, data = None, return_type = None, ignore_response_data = False, ignore_error_data = False) -> HTTPResponse:
-        resp = self._requests_session.request(
-            method,
-            url,
-            headers = {'Content-Type': 'application/json'} if data is not None else {},
-            data = json.dumps(serialize(data)) if data is not None else None,
-            allow_redirects = True,
+    def snapshot(self) -> dict:
+        """Credentials of this session (cookies and auth_headers), as JSON-serializable data."""
+        return dict(
+            headers = {
+                name: value
+                for name, value in self.headers.items() if name.lower() in self.auth_headers
+            },
+            cookies = [dict(name = c.name, value = c.value, domain = c.domain, path = c.path, secure = c.secure, expires = c.expires) for c in self.cookies],
         )
 
+    def restore(self, snapshot):
+        """Load credentials saved by snapshot() - other headers of this session are kept."""
+        for name in [name for name in self.headers if name.lower() in self.auth_headers]:
+            del self.headers[name]
+        self.headers.update(snapshot['headers'])
+        self.cookies.clear()
+        for cookie in snapshot['cookies']:
+            self.cookies.set(**cookie)
+
+    def url(self, url) -> str:
+        """Resolve `url` against this session's base_url (absolute URLs are returned unchanged)."""
+        return urljoin(self.settings.base_url, url)
+
+    def _send(self, method, url, body = None, headers = None):
+        body_size = len(body) if body is not None else 0
+        wire_body = body
+        if self._compress is not None and body_size >= self.settings.compression_min_bytes:
+            wire_body = self._compress(body.encode() if isinstance(body, str) else body)
+            headers = dict(headers or {}, **{'Content-Encoding': self.settings.compression})
+
+        attempt = 0
+        while True:
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+
+            with self._semaphore:
+                start = perf_counter()
+                resp = self._requests_session.request(
+                    method,
+                    url,
+                    headers = headers or {},
+                    data = wire_body,
+                    allow_redirects = True,
+                    timeout = self.settings.timeout,
+                )
+                elapsed = perf_counter() - start
+
+            notify(self, Exchange(method, url, resp.status_code, body_size, len(resp.content), elapsed, len(wire_body) if wire_body is not None else 0, resp.raw.tell()))
+
+            delay = self.retry.delay(attempt, resp.status_code, resp.headers, method)
+            if delay is None:
+                return resp
+
+            if self.rate_limiter and resp.status_code == 429:
+                self.rate_limiter.pause(delay)
+            sleep(delay)
+            attempt += 1
+
+    def request(self, method, url, data = None, return_type = None, ignore_response_data = False, ignore_error_data = False, raise_error = True) -> HTTPResponse:
+        """Send a request and decode its response.
+
+        Error responses (status >= 400) are raised - or, with `raise_error = False`, returned with their data decoded only when accessed.
+        """
+        url = self.url(url)
+        body = self._codec.dumps(serialize(data)) if data is not None else None
+        headers = {'Content-Type': 'application/json'} if data is not None else {}
+
+        cache_key = cached = None
+        if self.cache is not None and method == 'GET':
+            cache_key = (url, return_type, ignore_response_data)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                if cached.etag:
+                    headers['If-None-Match'] = cached.etag
+                if cached.last_modified:
+                    headers['If-Modified-Since'] = cached.last_modified
+
+        resp = self._send(method, url, body, headers)
+
+        if self.cache is not None:
+            if cached is not None and resp.status_code == 304:
+                self.cache.hits += 1
+                return cached.response
+            if method != 'GET' and method != 'HEAD':
+                self.cache.invalidate(url)
+            elif cache_key is not None:
+                self.cache.misses += 1
+
+        if resp.status_code >= 400 and not raise_error:
+            if ignore_error_data:
+                return response_class(resp.status_code)(...)
+            return response_class(resp.status_code).deferred(resp.content, self._decode_error)
+
         if return_type and resp.status_code < 400:
-            resp_content = unserialize(return_type, resp.json()) if not ignore_response_data else ...
+            resp_content = unserialize(return_type, self._codec.loads(resp.content), self.settings.validate) if not ignore_response_data else ...
         else:
             if ignore_error_data:
                 resp_content = ...
             elif not resp.content:
                 resp_content = None
             else:
-                resp_content = make_schemaless_object(resp.json())
+                resp_content = make_schemaless_object(self._codec.loads(resp.content))
 
-        response = responses[resp.status_code](resp_content)
+        response = response_class(resp.status_code)(resp_content)
 
         if response.code >= 400:
             raise response
 
+        if cache_key is not None and response.code == 200:
+            etag = resp.headers.get('ETag')
+            last_modified = resp.headers.get('Last-Modified')
+            if etag or last_modified:
+                self.cache.put(cache_key, CacheEntry(etag, last_modified, response, len(resp.content)))
+
         return response
 
-    def get(self, url, return_type = None, ignore_response_data = False, ignore_error_data = False) -> HTTPResponse:
-        return self.request('GET', url, return_type = return_type, ignore_response_data = ignore_response_data, ignore_error_data = ignore_error_data)
+    def get(self, url, return_type = None, ignore_response_data = False, ignore_error_data = False, raise_error = True) -> HTTPResponse:
+        return self.request('GET', url, return_type = return_type, ignore_response_data = ignore_response_data, ignore_error_data = ignore_error_data, raise_error = raise_error)
+
+    def post(self, url, data, return_type = None, ignore_response_data = False, ignore_error_data = False, raise_error = True) -> HTTPResponse:
+        return self.request('POST', url, data, return_type = return_type, ignore_response_data = ignore_response_data, ignore_error_data = ignore_error_data, raise_error = raise_error)
+
+    def patch(self, url, data, return_type = None, ignore_response_data = False, ignore_error_data = False, raise_error = True) -> HTTPResponse:
+        return self.request('PATCH', url, data, return_type = return_type, ignore_response_data = ignore_response_data, ignore_error_data = ignore_error_data, raise_error = raise_error)
+
+    def put(self, url, data, return_type = None, ignore_response_data = False, ignore_error_data = False, raise_error = True) -> HTTPResponse:
+        return self.request('PUT', url, data, return_type = return_type, ignore_response_data = ignore_response_data, ignore_error_data = ignore_error_data, raise_error = raise_error)
+
+    def delete(self, url, return_type = None, ignore_response_data = False, ignore_error_data = False, raise_error = True) -> HTTPResponse:
+        return self.request('DELETE', url, return_type = return_type, ignore_response_data = ignore_response_data, ignore_error_data = ignore_error_data, raise_error = raise_error)
+
+    def _decode_error(self, content):
+        return make_schemaless_object(self._codec.loads(content)) if content else None
+
+    def _error(self, resp):
+        return response_class(resp.status_code)(self._decode_error(resp.content))
+
+    def _pages(self, url, items, next, cursor, offset, limit, page_size):
+        url = self.url(url)
+        if page_size is not None:
+            url = _with_params(url, {limit: page_size})
+        position = 0
+
+        while True:
+            resp = self._send('GET', url)
+            if resp.status_code >= 400:
+                raise self._error(resp)
+
+            page = self._codec.loads(resp.content)
+            page_items = page if items is None else page[items]
+            yield page_items
+
+            if offset is not None:
+                if not page_items or (page_size is not None and len(page_items) < page_size):
+                    return
+                position += len(page_items)
+                url = _with_params(url, {offset: position})
+            else:
+                token = page.get(next) if isinstance(page, dict) else None
+                if not token:
+                    return
+                url = _with_params(url, {cursor: token}) if cursor is not None else urljoin(url, token)
+
+    def iterate(self, url, return_type = None, items = 'results', next = 'next', cursor = None, offset = None, limit = 'limit', page_size = None, prefetch = 1) -> typing.Iterator:
+        """Iterate over all items of a paginated collection, fetching up to `prefetch` pages ahead in the background.
+
+        Pages are JSON objects with the items under `items` (or plain lists when `items` is None). The next page is found by:
+        * `next` - URL of the next page (default),
+        * `cursor` - query parameter that receives the value of the `next` property,
+        * `offset` - query parameter incremented by the number of items received (with `limit` = `page_size`).
+        """
+        validate = self.settings.validate
+        for page_items in prefetched(self._pages(url, items, next, cursor, offset, limit, page_size), prefetch):
+            for item in page_items:
+                yield unserialize(return_type, item, validate) if return_type else make_schemaless_object(item)
+
+    def stream(self, url, return_type = None, format = None, chunk_size = 8192, max_buffer = 1024 * 1024, timestamp_field = None) -> typing.Iterator:
+        """Iterate over events of a Server-Sent Events or NDJSON (chunked) response as they arrive.
+
+        The response is read only as fast as events are consumed, and at most `max_buffer` bytes of a single event are buffered.
+        SSE data that is not JSON (e.g. `data: ping` keepalives) is yielded as a string.
+        If `timestamp_field` is given, every Event carries its delivery latency: time of receipt minus that (ISO date-time or epoch seconds) property of the data.
+        """
+        url = self.url(url)
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+
+        start = perf_counter()
+        resp = self._requests_session.get(url, headers = {'Accept': 'text/event-stream' if format == 'sse' else 'application/x-ndjson, text/event-stream'}, stream = True, timeout = self.settings.timeout)
+        received = 0
+        try:
+            if resp.status_code >= 400:
+                raise self._error(resp)
+
+            if format is None:
+                format = 'sse' if resp.headers.get('Content-Type', '').startswith('text/event-stream') else 'ndjson'
+
+            def chunks():
+                nonlocal received
+                for chunk in resp.iter_content(chunk_size):
+                    received += len(chunk)
+                    yield chunk
+
+            parse = sse_events if format == 'sse' else ndjson_events
+            validate = self.settings.validate
+            decode = (lambda data: unserialize(return_type, data, validate)) if return_type else make_schemaless_object
+            yield from decode_events(parse(chunks(), max_buffer), decode, timestamp_field, self._codec.loads, allow_text = format == 'sse')
+        finally:
+            resp.close()
+            notify(self, Exchange('GET', url, resp.status_code, 0, received, perf_counter() - start, 0, resp.raw.tell()))
+
+
+class AsyncHTTPSession:
+    """asyncio front of an HTTPSession
+
+    Requests run on a thread pool as large as `max_concurrency`, sharing the session's connection pool, cookies and headers - so many signup / confirm flows can be awaited at once.
+    """
+
+    def __init__(self, session = None, **overrides):
+        self.session = session or HTTPSession(**overrides)
+        self._executor = ThreadPoolExecutor(self.session.settings.max_concurrency)
+
+    @property
+    def headers(self):
+        return self.session.headers
+
+    @property
+    def cookies(self):
+        return self.session.cookies
+
+    async def request(self, method, url, data = None, return_type = None, ignore_response_data = False, ignore_error_data = False, raise_error = True) -> HTTPResponse:
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self._executor, partial(self.session.request, method, url, data, return_type, ignore_response_data, ignore_error_data, raise_error))
+
+    async def get(self, url, return_type = None, ignore_response_data = False, ignore_error_data = False, raise_error = True) -> HTTPResponse:
+        return await self.request('GET', url, return_type = return_type, ignore_response_data = ignore_response_data, ignore_error_data = ignore_error_data, raise_error = raise_error)
+
+    async def post(self, url, data, return_type = None, ignore_response_data = False, ignore_error_data = False, raise_error = True) -> HTTPResponse:
+        return await self.request('POST', url, data, return_type = return_type, ignore_response_data = ignore_response_data, ignore_error_data = ignore_error_data, raise_error = raise_error)
+
+    async def patch(self, url, data, return_type = None, ignore_response_data = False, ignore_error_data = False, raise_error = True) -> HTTPResponse:
+        return await self.request('PATCH', url, data, return_type = return_type, ignore_response_data = ignore_response_data, ignore_error_data = ignore_error_data, raise_error = raise_error)
+
+    async def put(self, url, data, return_type = None, ignore_response_data = False, ignore_error_data = False, raise_error = True) -> HTTPResponse:
+        return await self.request('PUT', url, data, return_type = return_type, ignore_response_data = ignore_response_data, ignore_error_data = ignore_error_data, raise_error = raise_error)
 
-    def post(self, url, data, return_type = None, ignore_response_data = False, ignore_error_data = False) -> HTTPResponse:
-        return self.request('POST', url, data, return_type = return_type, ignore_response_data = ignore_response_data, ignore_error_data = ignore_error_data)
+    async def delete(self, url, return_type = None, ignore_response_data = False, ignore_error_data = False, raise_error = True) -> HTTPResponse:
+        return await self.request('DELETE', url, return_type = return_type, ignore_response_data = ignore_response_data, ignore_error_data = ignore_error_data, raise_error = raise_error)
 
-    def patch(self, url, data, return_type = None, ignore_response_data = False, ignore_error_data = False) -> HTTPResponse:
-        return self.request('PATCH', url, data, return_type = return_type, ignore_response_data = ignore_response_data, ignore_error_data = ignore_error_data)
+    def close(self):
+        self._executor.shutdown(wait = False)
 
-    def put(self, url, data, return_type = None, ignore_response_data = False, ignore_error_data = False) -> HTTPResponse:
-        return self.request('PUT', url, data, return_type = return_type, ignore_response_data = ignore_response_data, ignore_error_data = ignore_error_data)
+    async def __aenter__(self):
+        return self
 
-    def delete(self, url, return_type = None, ignore_response_data = False, ignore_error_data = False) -> HTTPResponse:
-        return self.request('DELETE', url, return_type = return_type, ignore_response_data = ignore_response_data, ignore_error_data = ignore_error_data)
+    async def __aexit__(self, *exc_info):
+        self.close()
@@ -1,10 +1,14 @@
+import asyncio
+import collections
+import threading
 import typing
 import uuid
+import weakref
 from dataclasses import dataclass
 
 import requests
 
-from resttest.conf import MAILCATCHER_URL
+from resttest import conf
 
 
 @dataclass
@@ -19,20 +23,197 @@ class Message:
     size: int
 
 
+# Mailcatcher instances used by this process, purged at the end of the test session.
+used_mailcatchers = set()
+
+
+def purge(mailcatcher_url = None):
+    """Delete all messages held by mailcatcher."""
+    requests.delete(f'{mailcatcher_url or conf.settings.mailcatcher_url}messages')
+
+
+def _sorted(messages):
+    return sorted(messages, key = lambda message: message['id'])
+
+
 class MailBox:
-    """Email account"""
+    """Email account
+
+    Read messages are deleted from mailcatcher (unless `delete_read = False`), and `close()` deletes the unread ones, so the message list - downloaded on every check - stays short.
+    Messages with ids up to the watermark are already known to be read or sent to someone else, and are skipped without looking at them.
+    """
 
-    def __init__(self):
+    def __init__(self, mailcatcher_url = None, delete_read = True):
+        self.mailcatcher_url = mailcatcher_url or conf.settings.mailcatcher_url
         self.email = f'{uuid.uuid4().hex}@localhost'
+        self.delete_read = delete_read
         self.read_messages = set()
+        self.watermark = 0
+        used_mailcatchers.add(self.mailcatcher_url)
 
     @property
     def unread_messages(self) -> typing.Iterable[Message]:
-        for message in requests.get(f'{MAILCATCHER_URL}messages').json():
+        for message in _sorted(requests.get(f'{self.mailcatcher_url}messages').json()):
             message_id = message['id']
+            if message_id <= self.watermark:
+                continue
+            self.watermark = message_id
             if f'<{self.email}>' in message['recipients']:
-                if message_id in self.read_messages:
-                    continue
                 self.read_messages.add(message_id)
-                message['text'] = requests.get(f'{MAILCATCHER_URL}messages/{message_id}.plain').text
-                yield Message(**{k: message[k] for k in Message.__dataclass_fields__})
+                message['text'] = requests.get(f'{self.mailcatcher_url}messages/{message_id}.plain').text
+                if self.delete_read:
+                    requests.delete(f'{self.mailcatcher_url}messages/{message_id}')
+                yield _message(message)
+
+    def close(self):
+        """Delete all remaining messages sent to this mailbox."""
+        for message in requests.get(f'{self.mailcatcher_url}messages').json():
+            if f'<{self.email}>' in message['recipients']:
+                requests.delete(f'{self.mailcatcher_url}messages/{message["id"]}')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _message(data) -> Message:
+    return Message(**{k: data[k] for k in Message.__dataclass_fields__})
+
+
+class MailPoller:
+    """Polls mailcatcher once for all AsyncMailBoxes, handing every new message to the mailbox it was sent to
+
+    Polling runs only while some mailbox is waiting for a message. Delivered messages are deleted from mailcatcher, and messages up to the watermark are skipped.
+    If polling fails, the waiting mailboxes raise the error.
+    """
+
+    # Pollers by event loop and mailcatcher URL - a poller's task and events belong to a single loop.
+    _shared = weakref.WeakKeyDictionary()
+
+    def __init__(self, mailcatcher_url = None, interval = 0.1):
+        self.mailcatcher_url = mailcatcher_url or conf.settings.mailcatcher_url
+        self.interval = interval
+        self.mailboxes = {}
+        self.watermark = 0
+        self.waiting = 0
+        # requests.Session is not thread-safe, and requests run in executor threads.
+        self._local = threading.local()
+        self._task = None
+
+    @classmethod
+    def shared(cls, mailcatcher_url = None) -> 'MailPoller':
+        mailcatcher_url = mailcatcher_url or conf.settings.mailcatcher_url
+        pollers = cls._shared.setdefault(asyncio.get_event_loop(), {})
+        try:
+            return pollers[mailcatcher_url]
+        except KeyError:
+            poller = pollers[mailcatcher_url] = cls(mailcatcher_url)
+            used_mailcatchers.add(mailcatcher_url)
+            return poller
+
+    @property
+    def _session(self) -> requests.Session:
+        try:
+            return self._local.session
+        except AttributeError:
+            session = self._local.session = requests.Session()
+            return session
+
+    def register(self, mailbox):
+        self.mailboxes[f'<{mailbox.email}>'] = mailbox
+
+    def unregister(self, mailbox):
+        self.mailboxes.pop(f'<{mailbox.email}>', None)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        try:
+            while self.waiting:
+                await self.poll()
+                if self.waiting:
+                    await asyncio.sleep(self.interval)
+        except Exception as e:
+            for mailbox in list(self.mailboxes.values()):
+                mailbox._fail(e)
+
+    def _request(self, method, path):
+        resp = self._session.request(method, f'{self.mailcatcher_url}{path}')
+        resp.raise_for_status()
+        return resp
+
+    async def poll(self):
+        """Fetch new messages and deliver them to their mailboxes."""
+        loop = asyncio.get_event_loop()
+        messages = (await loop.run_in_executor(None, self._request, 'GET', 'messages')).json()
+
+        relevant = []
+        for message in _sorted(messages):
+            if message['id'] <= self.watermark:
+                continue
+            # Mailboxes register before their address is used, so a message nobody waits for now never becomes relevant.
+            self.watermark = message['id']
+            for recipient in message['recipients']:
+                mailbox = self.mailboxes.get(recipient)
+                if mailbox is not None:
+                    relevant.append((mailbox, message))
+
+        texts = await asyncio.gather(*(loop.run_in_executor(None, self._request, 'GET', f'messages/{message["id"]}.plain') for _, message in relevant))
+        await asyncio.gather(*(loop.run_in_executor(None, self._request, 'DELETE', f'messages/{message["id"]}') for _, message in relevant))
+        for (mailbox, message), text in zip(relevant, texts):
+            mailbox._deliver(_message(dict(message, text = text.text)))
+
+
+class AsyncMailBox:
+    """Email account for asyncio tests - many of them can await their messages at once, sharing one MailPoller"""
+
+    def __init__(self, mailcatcher_url = None, poller = None):
+        self.poller = poller or MailPoller.shared(mailcatcher_url)
+        self.email = f'{uuid.uuid4().hex}@localhost'
+        self.messages = collections.deque()
+        self._arrived = None
+        self._error = None
+        self.poller.register(self)
+
+    def _deliver(self, message):
+        self.messages.append(message)
+        if self._arrived is not None:
+            self._arrived.set()
+            self._arrived = None
+
+    def _fail(self, error):
+        """Wake up a waiting receive() with the error that stopped the poller."""
+        if self._arrived is not None:
+            self._error = error
+            self._arrived.set()
+            self._arrived = None
+
+    async def receive(self, timeout = 10.0) -> Message:
+        """Wait for the next message sent to this mailbox."""
+        while not self.messages:
+            if self._arrived is None:
+                self._arrived = asyncio.Event()
+            arrived = self._arrived
+            self.poller.waiting += 1
+            try:
+                self.poller.start()
+                await asyncio.wait_for(arrived.wait(), timeout)
+            finally:
+                self.poller.waiting -= 1
+            if self._error is not None:
+                error, self._error = self._error, None
+                raise error
+        return self.messages.popleft()
+
+    def close(self):
+        self.poller.unregister(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
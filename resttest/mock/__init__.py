@@ -0,0 +1 @@
+from resttest.mock.server import Collection, MockServer, collections_from_modules, serve
@@ -0,0 +1,13 @@
+import argparse
+import sys
+
+from resttest.mock.server import collections_from_modules, serve
+
+parser = argparse.ArgumentParser(prog = 'python -m resttest.mock', description = 'Serve the objects described by test modules from in-memory storage.')
+parser.add_argument('--host', default = '127.0.0.1')
+parser.add_argument('--port', type = int, default = 8000)
+parser.add_argument('--tests', default = 'tests', help = 'package containing test_<collection> modules')
+args = parser.parse_args()
+
+sys.path.insert(0, '.')
+serve(collections_from_modules(args.tests), args.host, args.port)
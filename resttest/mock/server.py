@@ -0,0 +1,232 @@
+import asyncio
+import importlib
+import itertools
+import json
+import pkgutil
+import threading
+import uuid
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+from resttest.validation import ValidationError
+
+
+class Collection:
+    """In-memory CRUD storage for the objects described by a schema type"""
+
+    def __init__(self, name, Object):
+        self.name = name
+        self.Object = Object
+        self.schema = Object.__resttest_schema__
+        self.records = {}
+        self._ids = itertools.count(1)
+
+        properties = getattr(self.schema, 'properties', {})
+        if not isinstance(properties, dict):
+            properties = properties._data
+        self.defaults = {name: getattr(prop_schema, 'default') for name, prop_schema in properties.items() if hasattr(prop_schema, 'default')}
+        id_type = getattr(properties.get('id'), 'type', None)
+        self.id_property = 'id' if 'id' in properties else None
+        self.string_ids = id_type == 'string'
+        self.validator = getattr(Object, '__resttest_validator__', None)
+
+    def _new_id(self):
+        return str(uuid.uuid4()) if self.string_ids else next(self._ids)
+
+    def _key(self, record_id):
+        return record_id if self.string_ids else int(record_id)
+
+    def _check(self, record):
+        if self.validator is not None:
+            self.validator(record)
+        missing = set(self.Object.__annotations__) - set(record) - set(self.defaults)
+        if missing:
+            raise ValidationError(f'missing required properties: {", ".join(sorted(missing))}')
+
+    def list(self):
+        return 200, list(self.records.values())
+
+    def create(self, data):
+        record = dict(self.defaults, **data)
+        record_id = self._new_id()
+        if self.id_property:
+            record[self.id_property] = record_id
+        self._check(record)
+        self.records[record_id] = record
+        return 201, record
+
+    def get(self, record_id):
+        return 200, self.records[self._key(record_id)]
+
+    def update(self, record_id, data, replace):
+        key = self._key(record_id)
+        current = self.records[key]
+        record = dict(self.defaults, **data) if replace else dict(current, **data)
+        if self.id_property:
+            record[self.id_property] = current.get(self.id_property, key)
+        self._check(record)
+        self.records[key] = record
+        return 200, record
+
+    def delete(self, record_id):
+        del self.records[self._key(record_id)]
+        return 204, None
+
+    def handle(self, method, record_id, data):
+        if record_id is None:
+            if method == 'GET':
+                return self.list()
+            if method == 'POST':
+                return self.create(data)
+        else:
+            if method == 'GET':
+                return self.get(record_id)
+            if method in ('PATCH', 'PUT'):
+                return self.update(record_id, data, replace = method == 'PUT')
+            if method == 'DELETE':
+                return self.delete(record_id)
+        return 405, dict(detail = 'Method not allowed.')
+
+
+def collections_from_modules(package = 'tests'):
+    """Collections for every `test_<name>` module of `package` that defines a schema-based `Object`."""
+    collections = []
+    for module in pkgutil.iter_modules([package.replace('.', '/')]):
+        if not module.name.startswith('test_'):
+            continue
+        try:
+            mod = importlib.import_module(f'{package}.{module.name}')
+        except ImportError as e:
+            print(f'{module.name}: {e}')
+            continue
+        Object = getattr(mod, 'Object', None)
+        if Object is not None and hasattr(Object, '__resttest_schema__'):
+            collections.append(Collection(module.name[5:], Object))
+    return collections
+
+
+class MockServer:
+    """Local stand-in for the API: HTTP/1.1 keep-alive on asyncio, JSON CRUD on /<collection>/ and /<collection>/<id>/"""
+
+    def __init__(self, collections, host = '127.0.0.1', port = 0):
+        self.collections = {c.name: c for c in collections}
+        self.host = host
+        self.port = port
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._connections = set()
+
+    @property
+    def base_url(self):
+        return f'http://{self.host}:{self.port}/'
+
+    def dispatch(self, method, path, body):
+        parts = [p for p in urlsplit(path).path.split('/') if p]
+        if not parts or parts[0] not in self.collections or len(parts) > 2:
+            return 404, dict(detail = 'Not found.')
+
+        try:
+            data = json.loads(body) if body else None
+        except ValueError:
+            return 400, dict(detail = 'Invalid JSON.')
+        if method in ('POST', 'PATCH', 'PUT') and not isinstance(data, dict):
+            return 400, dict(detail = 'Expected a JSON object.')
+
+        try:
+            return self.collections[parts[0]].handle(method, parts[1] if len(parts) > 1 else None, data)
+        except (KeyError, ValueError) as e:
+            if isinstance(e, ValidationError):
+                return 400, dict(detail = str(e))
+            return 404, dict(detail = 'Not found.')
+
+    async def _handle_connection(self, reader, writer):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+
+                request_line, *header_lines = head.decode('latin-1').split('\r\n')
+                method, path, version = request_line.split(' ', 2)
+                headers = {}
+                for line in header_lines:
+                    if line:
+                        name, _, value = line.partition(':')
+                        headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length', 0))
+                body = await reader.readexactly(length) if length else b''
+
+                status, data = self.dispatch(method, path, body)
+                payload = json.dumps(data).encode() if data is not None else b''
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+
+                response = [f'HTTP/1.1 {status} {HTTPStatus(status).phrase}', f'Content-Length: {len(payload)}']
+                if payload:
+                    response.append('Content-Type: application/json')
+                if not keep_alive:
+                    response.append('Connection: close')
+                writer.write(('\r\n'.join(response) + '\r\n\r\n').encode('latin-1') + payload)
+                await writer.drain()
+
+                if not keep_alive:
+                    return
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def start_async(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port, backlog = 1024)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self._server
+
+    def start(self):
+        """Serve from a background thread; returns the base URL."""
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.start_async())
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target = run, daemon = True)
+        self._thread.start()
+        ready.wait()
+        return self.base_url
+
+    async def stop_async(self):
+        self._server.close()
+        for task in list(self._connections):
+            task.cancel()
+        await asyncio.gather(*self._connections, return_exceptions = True)
+        await self._server.wait_closed()
+
+    def stop(self):
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self.stop_async(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._loop = None
+
+
+def serve(collections, host = '127.0.0.1', port = 8000):
+    server = MockServer(collections, host, port)
+
+    async def main():
+        await server.start_async()
+        print(f'Serving {", ".join(server.collections) or "nothing"} on {server.base_url}')
+        async with server._server:
+            await server._server.serve_forever()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
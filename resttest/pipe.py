@@ -49,7 +49,6 @@ class matches:
                 return False
             value = list(value)
             for perm in permutations(self.pattern):
-                print(perm)
                 if value | matches(perm):
                     return True
             return False
@@ -0,0 +1,123 @@
+import threading
+from contextlib import contextmanager
+
+SCOPES = ('worker', 'test')
+
+_pools = []
+
+
+class PoolStats:
+    """Resource pool hit/miss counters"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def saved(self):
+        """Number of factory calls (and their API round trips) avoided."""
+        return self.hits
+
+    def __repr__(self):
+        return f'PoolStats(hits = {self.hits}, misses = {self.misses})'
+
+
+class ResourcePool:
+    """Reusable API entities, created once per worker and leased to tests
+
+    Rules:
+    * `scope = 'test'` resources are never reused - use it for anything a test consumes or can't undo (deleted objects, one-time tokens, confirmed emails).
+    * `exclusive = True` resources (the default) are leased to one test at a time; `reset(obj)` runs before every reuse to undo what the previous test did.
+    * `exclusive = False` resources are handed out to any number of tests at once - only for objects tests never modify.
+    """
+
+    def __init__(self, Object, factory, scope = 'worker', reset = None, exclusive = True, name = None):
+        if scope not in SCOPES:
+            raise ValueError(f'Unknown pool scope: {scope}')
+        if scope == 'test' and not exclusive:
+            raise ValueError('Resources with test scope cannot be shared')
+
+        self.Object = Object
+        self.factory = factory
+        self.scope = scope
+        self.reset = reset
+        self.exclusive = exclusive
+        self.name = name or getattr(Object, '__name__', repr(Object))
+        self.stats = PoolStats()
+
+        self._free = []
+        self._shared = None
+        self._lock = threading.Lock()
+        self._shared_lock = threading.Lock()
+
+    def acquire(self):
+        if self.scope == 'worker' and not self.exclusive:
+            # Created under the lock, so concurrent first leases don't build several objects.
+            with self._shared_lock:
+                if self._shared is None:
+                    self.stats.misses += 1
+                    self._shared = self.factory()
+                else:
+                    self.stats.hits += 1
+                return self._shared
+
+        with self._lock:
+            if self.scope == 'worker' and self._free:
+                self.stats.hits += 1
+                obj = self._free.pop()
+                reused = True
+            else:
+                self.stats.misses += 1
+                reused = False
+
+        if reused:
+            if self.reset is not None:
+                self.reset(obj)
+            return obj
+        return self.factory()
+
+    def release(self, obj):
+        if self.scope == 'worker' and self.exclusive:
+            with self._lock:
+                self._free.append(obj)
+
+    def discard(self, obj):
+        """Don't return a leased resource to the pool (e.g. the test broke it) - the next lease gets a new one."""
+        with self._lock:
+            self._free = [free for free in self._free if free is not obj]
+        with self._shared_lock:
+            if self._shared is obj:
+                self._shared = None
+
+    @contextmanager
+    def lease(self):
+        obj = self.acquire()
+        try:
+            yield obj
+        except BaseException:
+            # Shared resources are never modified by tests, so a failing test can't have broken them.
+            if self.exclusive:
+                self.discard(obj)
+            raise
+        else:
+            self.release(obj)
+
+    def clear(self):
+        with self._lock:
+            self._free.clear()
+        with self._shared_lock:
+            self._shared = None
+
+    def __repr__(self):
+        return f'ResourcePool({self.name}, scope = {self.scope!r}, {self.stats})'
+
+
+def pool(Object, factory, scope = 'worker', reset = None, exclusive = True, name = None) -> ResourcePool:
+    """Create a pool of reusable `Object`s built by `factory()`."""
+    resource_pool = ResourcePool(Object, factory, scope, reset, exclusive, name)
+    _pools.append(resource_pool)
+    return resource_pool
+
+
+def pools():
+    return list(_pools)
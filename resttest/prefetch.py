@@ -0,0 +1,46 @@
+import queue
+import threading
+
+_done = object()
+
+
+def prefetched(iterable, depth = 1):
+    """Iterate over `iterable` in a background thread, staying at most `depth` items ahead of the consumer."""
+    if depth <= 0:
+        yield from iterable
+        return
+
+    items = queue.Queue(maxsize = depth)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout = 0.1)
+            except queue.Full:
+                continue
+            return True
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        except BaseException as e:
+            put((_done, e))
+        else:
+            put((_done, None))
+
+    thread = threading.Thread(target = produce, daemon = True)
+    thread.start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is _done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
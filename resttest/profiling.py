@@ -0,0 +1,145 @@
+import json
+import os
+import re
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from time import perf_counter
+
+from resttest.stats import HTTPStats, observe
+
+_resttest_dir = os.path.dirname(os.path.abspath(__file__))
+_profiling_file = os.path.abspath(__file__)
+
+# (subsystem, path fragments) - the innermost frame matching any of them decides, so a thread blocked in socket.py is 'network' whoever called it.
+SUBSYSTEMS = [
+    ('network', [os.sep + 'socket.py', os.sep + 'ssl.py', os.sep + 'selectors.py', os.path.join('http', 'client.py'), os.sep + 'urllib3' + os.sep]),
+    ('decode', [os.path.join(_resttest_dir, 'schema.py'), os.path.join(_resttest_dir, 'validation.py'), os.path.join(_resttest_dir, 'columns.py'), os.path.join('json', 'decoder.py')]),
+    ('matches', [os.path.join(_resttest_dir, 'pipe.py')]),
+    ('http', [os.sep + 'requests' + os.sep, os.path.join(_resttest_dir, 'http.py')]),
+    ('resttest', [_resttest_dir + os.sep]),
+]
+
+
+def classify(filenames):
+    """Subsystem a stack (list of file names, outermost first) is spending its time in; 'test' if none."""
+    for filename in reversed(filenames):
+        for subsystem, fragments in SUBSYSTEMS:
+            for fragment in fragments:
+                if fragment in filename:
+                    return subsystem
+    return 'test'
+
+
+def _stack(frame):
+    frames = []
+    while frame is not None:
+        frames.append(frame.f_code)
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+class Sampler:
+    """Samples the stack of one thread at a fixed interval"""
+
+    def __init__(self, thread_id, interval = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.times = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        if self.thread_id == threading.get_ident():
+            # Never sample the sampler itself.
+            return
+        last = perf_counter()
+        own_frames = sys._current_frames
+        while not self._stop.wait(self.interval):
+            frame = own_frames().get(self.thread_id)
+            now = perf_counter()
+            elapsed, last = now - last, now
+            if frame is None:
+                continue
+            codes = _stack(frame)
+            if any(code.co_filename == _profiling_file for code in codes):
+                # Starting or stopping the sampler - profiler overhead, not time spent in the test.
+                continue
+            self.stacks[';'.join(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})' for code in codes)] += 1
+            self.times[classify([code.co_filename for code in codes])] += elapsed
+
+    def start(self):
+        self._thread = threading.Thread(target = self._run, daemon = True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def _file_name(name):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('_')
+
+
+class Profiler:
+    """Per-test CPU sampling and allocation tracking, attributed to resttest subsystems
+
+    For every profiled block it writes to `directory`:
+    * `<name>.folded` - collapsed stacks (flamegraph.pl, speedscope, inferno),
+    * `<name>.json` - seconds and allocated bytes per subsystem, plus HTTP time measured by HTTPSession.
+
+    Sampling is cheap; allocation tracking (`memory = True`) runs tracemalloc and slows Python code down many times.
+    """
+
+    def __init__(self, directory, interval = 0.005, memory = False, memory_frames = 8):
+        self.directory = directory
+        self.interval = interval
+        self.memory = memory
+        self.memory_frames = memory_frames
+        os.makedirs(directory, exist_ok = True)
+
+    @contextmanager
+    def profile(self, name):
+        sampler = Sampler(threading.get_ident(), self.interval)
+        started_tracemalloc = False
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start(self.memory_frames)
+            started_tracemalloc = True
+        before = tracemalloc.take_snapshot() if self.memory else None
+
+        start = perf_counter()
+        sampler.start()
+        try:
+            with observe(HTTPStats()) as http_stats:
+                yield
+        finally:
+            sampler.stop()
+            wall = perf_counter() - start
+            allocations = Counter()
+            if self.memory:
+                after = tracemalloc.take_snapshot()
+                for stat in after.compare_to(before, 'traceback'):
+                    if stat.size_diff > 0:
+                        allocations[classify([frame.filename for frame in stat.traceback])] += stat.size_diff
+                if started_tracemalloc:
+                    tracemalloc.stop()
+            self._write(name, sampler, wall, allocations, http_stats)
+
+    def _write(self, name, sampler, wall, allocations, http_stats):
+        base = os.path.join(self.directory, _file_name(name))
+        with open(base + '.folded', 'w') as f:
+            for stack, count in sampler.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+        with open(base + '.json', 'w') as f:
+            json.dump(dict(
+                name = name,
+                wall_seconds = wall,
+                sampled_seconds = dict(sampler.times),
+                allocated_bytes = dict(allocations),
+                http = dict(requests = http_stats.requests, seconds = http_stats.seconds, bytes_sent = http_stats.bytes_sent, bytes_received = http_stats.bytes_received, wire_bytes_sent = http_stats.wire_bytes_sent, wire_bytes_received = http_stats.wire_bytes_received),
+            ), f, indent = 2)
@@ -0,0 +1,176 @@
+import os
+from contextlib import nullcontext
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+from resttest import conf
+from resttest.http import HTTPSession
+from resttest.mailbox import purge, used_mailcatchers
+from resttest.pools import pools
+from resttest.stats import Budget, HTTPStats, observe
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('resttest')
+    group.addoption('--resttest-report', action = 'store_true', default = False, help = 'report HTTP requests, bytes and network time per test')
+    group.addoption('--resttest-profile', metavar = 'DIR', default = None, help = 'write per-test CPU samples (collapsed stacks) and per-subsystem time/allocation summaries to DIR')
+    group.addoption('--resttest-profile-memory', action = 'store_true', default = False, help = 'also attribute memory allocations to subsystems (tracemalloc, slow)')
+    group.addoption('--resttest-update-snapshots', action = 'store_true', default = False, help = 'rewrite snapshots that differ from the responses instead of failing')
+    group.addoption('--resttest-trace', metavar = 'PATH', default = None, help = 'record requests, responses and comments into a trace file for `python -m resttest.gendocs --trace PATH`')
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'resttest_budget(requests=None, seconds=None, bytes=None): fail the test if it exceeds the given HTTP usage')
+
+    workerinput = getattr(config, 'workerinput', None)
+    if workerinput is not None:
+        os.environ.setdefault('PYTEST_XDIST_WORKER', workerinput['workerid'])
+    # Settings made by conftest.py (resttest.configure) must survive - only the per-worker URL changes.
+    conf.reshard()
+    if config.getoption('resttest_update_snapshots'):
+        conf.configure(update_snapshots = True)
+
+    settings = conf.settings
+    HTTPSession.default_adapter = HTTPAdapter(pool_connections = settings.pool_connections, pool_maxsize = settings.pool_maxsize)
+
+    profile_dir = config.getoption('resttest_profile') or settings.profile_dir
+    if profile_dir:
+        from resttest.profiling import Profiler
+        config._resttest_profiler = Profiler(profile_dir, memory = config.getoption('resttest_profile_memory') or settings.profile_memory)
+
+    trace_path = config.getoption('resttest_trace')
+    if trace_path:
+        from resttest.gendocs.trace import Tracer
+        if workerinput is not None:
+            trace_path = f'{trace_path}.{workerinput["workerid"]}'
+        config._resttest_tracer = Tracer(trace_path)
+        config._resttest_tracer.install()
+
+
+def _pool_stats():
+    return {p.name: [p.stats.hits, p.stats.misses] for p in pools()}
+
+
+def pytest_sessionfinish(session):
+    workeroutput = getattr(session.config, 'workeroutput', None)
+    if workeroutput is not None:
+        workeroutput['resttest_pools'] = _pool_stats()
+        # Workers share mailcatcher, so only the controller purges it - once all of them are done.
+        workeroutput['resttest_mailcatchers'] = sorted(used_mailcatchers)
+        return
+
+    if conf.settings.mailcatcher_purge:
+        for mailcatcher_url in used_mailcatchers | _worker_mailcatchers:
+            try:
+                purge(mailcatcher_url)
+            except requests.RequestException:
+                pass
+
+
+_worker_pool_stats = []
+_worker_mailcatchers = set()
+
+
+@pytest.hookimpl(optionalhook = True)
+def pytest_testnodedown(node, error):
+    workeroutput = getattr(node, 'workeroutput', {})
+    stats = workeroutput.get('resttest_pools')
+    if stats:
+        _worker_pool_stats.append(stats)
+    _worker_mailcatchers.update(workeroutput.get('resttest_mailcatchers', ()))
+
+
+def pytest_unconfigure(config):
+    tracer = getattr(config, '_resttest_tracer', None)
+    if tracer is not None:
+        tracer.close()
+
+    if HTTPSession.default_adapter is not None:
+        HTTPSession.default_adapter.close()
+        HTTPSession.default_adapter = None
+
+
+def _budget(item):
+    marker = item.get_closest_marker('resttest_budget')
+    if marker is not None:
+        return Budget(**marker.kwargs)
+    return getattr(getattr(item, 'function', None), '__resttest_budget__', None)
+
+
+@pytest.hookimpl(hookwrapper = True)
+def pytest_runtest_call(item):
+    tracer = getattr(item.config, '_resttest_tracer', None)
+    case = tracer.case(item.module, item.function) if tracer is not None and hasattr(item, 'function') else nullcontext()
+
+    profiler = getattr(item.config, '_resttest_profiler', None)
+    profile = profiler.profile(item.nodeid) if profiler is not None else nullcontext()
+
+    with case, profile, observe(HTTPStats()) as stats:
+        outcome = yield
+
+    item.user_properties.append(('resttest_http', (stats.requests, stats.bytes_sent, stats.bytes_received, stats.seconds, stats.wire_bytes_sent, stats.wire_bytes_received)))
+
+    budget = _budget(item)
+    if budget is not None and outcome.excinfo is None:
+        violations = list(budget.violations(stats))
+        if violations:
+            pytest.fail('HTTP budget exceeded: ' + '; '.join(violations), pytrace = False)
+
+
+_reports = []
+
+
+def pytest_runtest_logreport(report):
+    if report.when != 'call':
+        return
+    for name, value in report.user_properties:
+        if name == 'resttest_http':
+            _reports.append((report.nodeid, *value))
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if not config.getoption('resttest_report'):
+        return
+
+    pool_stats = {}
+    for stats in [_pool_stats(), *_worker_pool_stats]:
+        for name, (hits, misses) in stats.items():
+            totals = pool_stats.setdefault(name, [0, 0])
+            totals[0] += hits
+            totals[1] += misses
+
+    if pool_stats:
+        terminalreporter.section('resttest resource pools')
+        terminalreporter.write_line(f'{"hits":>8} {"misses":>8}  pool')
+        for name, (hits, misses) in sorted(pool_stats.items()):
+            terminalreporter.write_line(f'{hits:>8} {misses:>8}  {name}')
+
+    if not _reports:
+        return
+
+    terminalreporter.section('resttest HTTP usage')
+    terminalreporter.write_line(f'{"requests":>8} {"sent":>10} {"received":>10} {"wire sent":>10} {"wire recv":>10} {"seconds":>8}  test')
+    for nodeid, reqs, sent, received, seconds, wire_sent, wire_received in sorted(_reports, key = lambda r: -r[4]):
+        terminalreporter.write_line(f'{reqs:>8} {sent:>10} {received:>10} {wire_sent:>10} {wire_received:>10} {seconds:>8.3f}  {nodeid}')
+
+
+@pytest.fixture(scope = 'session')
+def resttest_worker():
+    return conf.worker_index()
+
+
+@pytest.fixture(scope = 'session')
+def resttest_base_url():
+    return conf.settings.base_url
+
+
+@pytest.fixture(scope = 'session')
+def resttest_adapter():
+    return HTTPSession.default_adapter
+
+
+@pytest.fixture
+def http_session(resttest_adapter):
+    return HTTPSession(adapter = resttest_adapter)
@@ -0,0 +1,113 @@
+import hashlib
+import marshal
+import os
+
+import yaml
+
+from resttest import conf
+
+try:
+    _Loader = yaml.CSafeLoader
+except AttributeError:
+    _Loader = yaml.SafeLoader
+
+
+def user_cache_dir() -> str:
+    """Per-user cache directory of resttest ($XDG_CACHE_HOME/resttest, ~/.cache/resttest by default)"""
+    return os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'resttest')
+
+
+def parse(data: bytes, cache_dir = None):
+    """Parse a YAML / JSON schema file.
+
+    With a `cache_dir`, the result is stored there (as marshal data, which - unlike pickle - cannot run code when loaded) under the file's content hash and reused.
+    """
+    if cache_dir is None:
+        return yaml.load(data, Loader = _Loader)
+
+    directory = os.path.join(cache_dir, 'schemas')
+    path = os.path.join(directory, hashlib.sha256(data).hexdigest() + '.marshal')
+    try:
+        with open(path, 'rb') as f:
+            return marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    parsed = yaml.load(data, Loader = _Loader)
+    try:
+        cached = marshal.dumps(parsed)
+    except ValueError:
+        # YAML timestamps and other non-plain values
+        return parsed
+    try:
+        os.makedirs(directory, mode = 0o700, exist_ok = True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(cached)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+    return parsed
+
+
+class SchemaRegistry:
+    """Schema documents by file path - resolves `$ref`s pointing to other files (`common.yaml#/definitions/Address`)
+
+    Every file is parsed once per process - and, with `schema_cache` enabled (or an explicit `cache_dir`), YAML is parsed again only when the file changes.
+    Types and validators are dynamically created classes and closures, which cannot be stored, so they are rebuilt in every process.
+    """
+
+    def __init__(self, cache_dir = None):
+        self._cache_dir = cache_dir
+        self.documents = {}
+        self._by_hash = {}
+
+    @property
+    def cache_dir(self):
+        if self._cache_dir is not None:
+            return self._cache_dir
+        return user_cache_dir() if conf.settings.schema_cache else None
+
+    def register(self, location, document):
+        """Make `document` available to `$ref`s pointing at `location` (a path or URI)."""
+        self.documents[location] = document
+
+    def load(self, path):
+        """SchemaDocument stored in the given YAML / JSON file"""
+        path = os.path.abspath(path)
+        try:
+            return self.documents[path]
+        except KeyError:
+            pass
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        return self.load_data(data, path)
+
+    def load_data(self, data: bytes, path = None):
+        from resttest.schema import ALWAYS_DICTS, SchemaDocument, make_schemaless_object
+
+        digest = hashlib.sha256(data).hexdigest()
+        document = self._by_hash.get((digest, path))
+        if document is None:
+            document = SchemaDocument(make_schemaless_object(parse(data, self.cache_dir), ALWAYS_DICTS), registry = self, path = path)
+            self._by_hash[(digest, path)] = document
+        if path is not None:
+            self.documents[path] = document
+        return document
+
+    def get(self, location, base = None):
+        """Document referred to by `location`, relative to the document at `base`"""
+        if location in self.documents:
+            return self.documents[location]
+        if '://' in location:
+            raise KeyError(f'Schema {location} is not registered')
+        return self.load(os.path.join(os.path.dirname(base or ''), location))
+
+
+registry = SchemaRegistry()
+
+
+def load_schema(path):
+    """SchemaDocument of a schema file, from the default registry"""
+    return registry.load(path)
@@ -0,0 +1,108 @@
+import random
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from time import monotonic, sleep
+from typing import FrozenSet, Optional
+
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'TRACE', 'PUT', 'DELETE'})
+
+
+def parse_retry_after(value) -> Optional[float]:
+    """Seconds to wait according to a Retry-After header (delta-seconds or HTTP-date)."""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo = timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+@dataclass(frozen = True)
+class Retry:
+    """Retry policy for overloaded servers
+
+    Uses exponential backoff with full jitter, unless the server says how long to wait in Retry-After.
+    Non-idempotent requests (POST, PATCH) may already have been processed, so they are retried only when the server
+    rejected them with 429 / 503 and a Retry-After header - or on any of `statuses` with `retry_non_idempotent`.
+    """
+
+    attempts: int = 3
+    statuses: FrozenSet[int] = frozenset({429, 502, 503, 504})
+    backoff: float = 0.1
+    max_backoff: float = 10.0
+    respect_retry_after: bool = True
+    retry_non_idempotent: bool = False
+
+    def delay(self, attempt, status, headers, method = 'GET') -> Optional[float]:
+        """Seconds to sleep before retrying, or None if the request should not be retried."""
+        if attempt >= self.attempts or status not in self.statuses:
+            return None
+
+        retry_after = parse_retry_after(headers.get('Retry-After'))
+        if method.upper() not in IDEMPOTENT_METHODS and not self.retry_non_idempotent:
+            if status not in (429, 503) or retry_after is None:
+                return None
+
+        if self.respect_retry_after:
+            if retry_after is not None:
+                return retry_after + random.uniform(0, self.backoff)
+
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+class TokenBucket:
+    """Client-side rate limiter, safe to share between sessions and threads
+
+    Allows `rate` requests per second on average, with bursts of up to `burst` requests.
+    """
+
+    def __init__(self, rate, burst = None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens):
+        with self._lock:
+            now = monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            wait = max(-self._tokens / self.rate, self._paused_until - now)
+            return max(0.0, wait)
+
+    def acquire(self, tokens = 1):
+        """Block until `tokens` requests may be sent."""
+        wait = self._reserve(tokens)
+        if wait:
+            sleep(wait)
+
+    def pause(self, seconds):
+        """Stop handing out tokens for `seconds` - used when the server asks us to back off."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, monotonic() + seconds)
+
+
+_shared_buckets = {}
+_shared_buckets_lock = threading.Lock()
+
+
+def shared_bucket(rate, burst = None) -> TokenBucket:
+    """Process-wide TokenBucket for the given rate."""
+    with _shared_buckets_lock:
+        try:
+            return _shared_buckets[rate, burst]
+        except KeyError:
+            bucket = _shared_buckets[rate, burst] = TokenBucket(rate, burst)
+            return bucket
@@ -1,12 +1,16 @@
 from __future__ import annotations
 
+import collections.abc
 from datetime import datetime, timezone
 from typing import Any, Mapping, Sequence, Union
 from warnings import warn
 
 from pkg_resources import resource_string
 from typing_extensions import Literal
-from yaml import safe_load
+
+from resttest import conf
+from resttest.registry import parse
+from resttest.validation import Compiler
 
 ALWAYS_DICTS = {'definitions', 'properties'}
 
@@ -44,10 +48,41 @@ class Undefined:
 
 
 class SchemaDocument:
-    def __init__(self, schema: Schema):
+    def __init__(self, schema: Schema, registry = None, path = None):
         self.document = schema
-        if isinstance(self.document.definitions, SchemalessObject):
+        if isinstance(getattr(self.document, 'definitions', None), SchemalessObject):
             self.document.definitions = self.document.definitions._data
+        self.registry = registry
+        self.path = path
+        self._compiler = Compiler(self)
+        self._types = {}
+
+    def resolve_document(self, ref):
+        """(SchemaDocument, schema) a $ref points to - refs to other files go through the registry."""
+        location, _, pointer = ref.partition('#')
+        document = self
+        if location:
+            if self.registry is None:
+                raise ValueError(f'Cannot resolve {ref}: the document has no schema registry')
+            document = self.registry.get(location, self.path)
+
+        node = document.document
+        for part in pointer.split('/')[1:]:
+            part = part.replace('~1', '/').replace('~0', '~')
+            if isinstance(node, dict):
+                node = node[part]
+            elif isinstance(node, list):
+                node = node[int(part)]
+            else:
+                node = getattr(node, part)
+        return document, node
+
+    def resolve(self, ref):
+        return self.resolve_document(ref)[1]
+
+    def validator(self, schema):
+        """Compiled validator for `schema` - raises ValidationError when the data does not conform to it."""
+        return self._compiler.compile(schema)
 
     def to_type(self, schema: Schema, override_type = None):
         assert not isinstance(schema, dict)
@@ -59,9 +94,11 @@ class SchemaDocument:
                 # TODO Recursion
                 return Any
 
-            assert ref.startswith('#/definitions/')
-            def_name = ref[len('#/definitions/'):]
-            return self.to_type(self.document.definitions[def_name])
+            document, target = self.resolve_document(ref)
+            key = (id(target), None)
+            if key not in document._types:
+                document._types[key] = document.to_type(target)
+            return document._types[key]
 
         if schema == True:
             return Any
@@ -130,12 +167,16 @@ class SchemaDocument:
                     __annotations__ = property_types,
                     __resttest_plain__ = True,
                     __resttest_schema__ = schema,
+                    __resttest_validator__ = staticmethod(self.validator(schema)),
+                    __resttest_document__ = self,
                     __init__ = __init__,
                     __str__ = __str__,
                     __repr__ = __str__,
                 ))
 
                 Full = type(schema.title or '', (Patch,), dict(
+                    # Python 3.10+ gives every class its own (empty) __annotations__ instead of inheriting them.
+                    __annotations__ = property_types,
                     Patch = Patch,
                     **default_values,
                 ))
@@ -177,10 +218,57 @@ def schema_to_type(top_level_schema: Schema, chosen_schema: Schema = None):
     return SchemaDocument(top_level_schema).to_type(chosen_schema or top_level_schema)
 
 
-Schema = schema_to_type(make_schemaless_object(safe_load(resource_string(__name__, 'schema.yaml'))))
+Schema = schema_to_type(make_schemaless_object(parse(resource_string(__name__, 'schema.yaml'))))
+
+
+_NON_OBJECT_TYPES = {type(None), bool, int, float, str, datetime, list}
+_discriminators = {}
+
+
+def _literal_values(prop_type):
+    if getattr(prop_type, '__origin__', None) == Literal:
+        return prop_type.__args__
+    return None
+
+
+def _find_discriminator(Object):
+    variants = [arg for arg in Object.__args__ if getattr(arg, '__resttest_plain__', False)]
+    others = [arg for arg in Object.__args__ if arg not in variants]
+    if len(variants) < 2 or any(arg not in _NON_OBJECT_TYPES and getattr(arg, '__origin__', None) not in (Literal, Sequence, collections.abc.Sequence) for arg in others):
+        return None
+
+    for prop_name in variants[0].__annotations__:
+        mapping = {}
+        try:
+            for variant in variants:
+                values = _literal_values(variant.__annotations__.get(prop_name))
+                if values is None:
+                    break
+                for value in values:
+                    if value in mapping:
+                        raise TypeError('Duplicate discriminator value')
+                    mapping[value] = variant
+            else:
+                return prop_name, mapping
+        except TypeError:
+            continue
+
+    return None
+
+
+def _discriminator(Object):
+    """(property name, {value: type}) for anyOf-s of objects distinguished by a const property, or None."""
+    try:
+        return _discriminators[Object]
+    except KeyError:
+        discriminator = _discriminators[Object] = _find_discriminator(Object)
+        return discriminator
+
 
+def unserialize(Object, data, validate = None):
+    if validate is None:
+        validate = conf.settings.validate
 
-def unserialize(Object, data):
     if Object == Schema:
         # TODO delete after this becomes strong enough to interpret JSON Schema schema correctly
         return make_schemaless_object(data, ALWAYS_DICTS)
@@ -223,10 +311,18 @@ def unserialize(Object, data):
             raise NotImplementedError('Parsing dates with non-Z timezones is not supported.')
         return datetime.fromisoformat(data[:-1]).replace(tzinfo = timezone.utc)
 
+    if getattr(Object, '__resttest_columns__', False):
+        return Object.decode(data, validate)
+
     if getattr(Object, '__resttest_plain__', False):
         if not isinstance(data, dict):
             raise ValueError(Object)
 
+        if validate:
+            Object.__resttest_validator__(data)
+            # The validator has already checked the whole subtree.
+            validate = False
+
         unknown_data = set(data.keys()) - set(Object.__annotations__.keys())
         if unknown_data != set():
             warn(f'{Object.__name__} has unknown properties: {", ".join(unknown_data)}', UserWarning, 2)
@@ -238,16 +334,26 @@ def unserialize(Object, data):
         kwargs = dict()
         for prop_name, prop_type in Object.__annotations__.items():
             if prop_name in data:
-                kwargs[prop_name] = unserialize(prop_type, data[prop_name])
+                kwargs[prop_name] = unserialize(prop_type, data[prop_name], validate)
 
         return Object(**kwargs)
 
     if getattr(Object, '__origin__', None) == Union:
+        discriminator = _discriminator(Object)
+        if discriminator is not None and isinstance(data, dict):
+            prop_name, variants = discriminator
+            try:
+                variant = variants[data[prop_name]]
+            except (KeyError, TypeError):
+                pass
+            else:
+                return unserialize(variant, data, validate)
+
         results = []
 
         for arg in Object.__args__:
             try:
-                results.append(unserialize(arg, data))
+                results.append(unserialize(arg, data, validate))
             except ValueError as e:
                 pass
 
@@ -268,7 +374,7 @@ def unserialize(Object, data):
         if not isinstance(data, list):
             raise ValueError(Object)
         item_type = Object.__args__[0]
-        return [unserialize(item_type, item) for item in data]
+        return [unserialize(item_type, item, validate) for item in data]
 
     if Object == list:
         if not isinstance(data, list):
@@ -0,0 +1,82 @@
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+
+from resttest import conf
+from resttest.http import HTTPSession
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+@contextmanager
+def _locked(path):
+    with open(path, 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class SessionCache:
+    """On-disk cache of logged-in HTTPSession snapshots, shared by all processes (e.g. pytest-xdist workers)"""
+
+    def __init__(self, directory = None, ttl = 3600):
+        self.directory = directory or os.path.join(conf.settings.cache_dir, 'sessions')
+        self.ttl = ttl
+        os.makedirs(self.directory, mode = 0o700, exist_ok = True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + '.json')
+
+    def get(self, key):
+        try:
+            with open(self._path(key)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if entry['expires'] < time.time():
+            return None
+        return entry['snapshot']
+
+    def put(self, key, snapshot):
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        # Snapshots hold credentials - readable by the owner only.
+        with os.fdopen(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as f:
+            json.dump(dict(key = key, expires = time.time() + self.ttl, snapshot = snapshot), f)
+        os.replace(tmp_path, path)
+
+    def invalidate(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def session(self, role, login, settings = None, **overrides) -> HTTPSession:
+        """HTTPSession logged in as `role`.
+
+        `login(session)` is called to log a fresh session in - at most once per TTL across all processes sharing the cache directory.
+        """
+        session = HTTPSession(settings, **overrides)
+        key = f'{session.settings.base_url}|{role}'
+
+        snapshot = self.get(key)
+        if snapshot is None:
+            with _locked(self._path(key) + '.lock'):
+                snapshot = self.get(key)
+                if snapshot is None:
+                    login(session)
+                    self.put(key, session.snapshot())
+                    return session
+
+        session.restore(snapshot)
+        return session
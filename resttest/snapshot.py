@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Any, NamedTuple, Union
+
+from resttest import conf
+from resttest.http import HTTPResponse
+from resttest.pipe import matches, pipify
+from resttest.schema import SchemalessObject
+
+VOLATILE = '<volatile>'
+
+
+class Node(NamedTuple):
+    """Subtree of a canonicalized value, with a structural hash of its contents"""
+
+    hash: str
+    value: Any
+    children: Union[dict, list, None]
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size = 16).hexdigest()
+
+
+def canonical(value):
+    """JSON form of a response, response data or plain object"""
+    if isinstance(value, HTTPResponse):
+        return dict(code = value.code, data = canonical(value.data))
+    if isinstance(value, SchemalessObject):
+        return canonical(value._data)
+    if getattr(type(value), '__resttest_plain__', False):
+        return canonical(value.__dict__)
+    if isinstance(value, dict):
+        return {str(k): canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [canonical(v) for v in value]
+    if isinstance(value, datetime):
+        return value.isoformat().replace('+00:00', 'Z')
+    if value is ...:
+        return None
+    return value
+
+
+def _is_volatile(value, pattern):
+    try:
+        return bool(value | matches(pattern))
+    except (TypeError, AttributeError):
+        return False
+
+
+def tree(value, volatile = None) -> Node:
+    """Merkle tree of a canonical value.
+
+    Values of `volatile` keys (e.g. `{'id': int, 'created_at': str}`) matching their patterns are replaced with a placeholder at any depth.
+    """
+    if isinstance(value, dict):
+        children = {}
+        for k, v in value.items():
+            if volatile and k in volatile and _is_volatile(v, volatile[k]):
+                v = VOLATILE
+            children[k] = tree(v, volatile)
+        items = sorted(children.items())
+        digest = _digest(b'{' + b','.join(json.dumps(k).encode() + b':' + child.hash.encode() for k, child in items) + b'}')
+        return Node(digest, {k: child.value for k, child in items}, children)
+    if isinstance(value, list):
+        children = [tree(v, volatile) for v in value]
+        digest = _digest(b'[' + b','.join(child.hash.encode() for child in children) + b']')
+        return Node(digest, [child.value for child in children], children)
+    return Node(_digest(json.dumps(value).encode()), value, None)
+
+
+def diff(expected: Node, actual: Node, path = '$'):
+    """Differences between two trees, as (path, expected, actual) - only subtrees with different hashes are visited."""
+    if expected.hash == actual.hash:
+        return
+    if isinstance(expected.children, dict) and isinstance(actual.children, dict):
+        for k, child in expected.children.items():
+            if k not in actual.children:
+                yield f'{path}.{k}', child.value, None
+            else:
+                yield from diff(child, actual.children[k], f'{path}.{k}')
+        for k, child in actual.children.items():
+            if k not in expected.children:
+                yield f'{path}.{k}', None, child.value
+    elif isinstance(expected.children, list) and isinstance(actual.children, list):
+        for i, (e, a) in enumerate(zip(expected.children, actual.children)):
+            yield from diff(e, a, f'{path}[{i}]')
+        for i in range(len(actual.children), len(expected.children)):
+            yield f'{path}[{i}]', expected.children[i].value, None
+        for i in range(len(expected.children), len(actual.children)):
+            yield f'{path}[{i}]', None, actual.children[i].value
+    else:
+        yield path, expected.value, actual.value
+
+
+class SnapshotMismatch(AssertionError):
+    """Response differs from its snapshot"""
+
+    def __init__(self, name, differences):
+        self.name = name
+        self.differences = differences
+        lines = [f'snapshot {name!r} differs:']
+        for path, expected, actual in differences:
+            lines.append(f'  {path}: {json.dumps(expected)} != {json.dumps(actual)}')
+        super().__init__('\n'.join(lines))
+
+
+@pipify
+class matches_snapshot:
+    """Compare a response with a stored snapshot: `assert resp | matches_snapshot('users_list', volatile = {'id': int})`
+
+    Raises SnapshotMismatch listing the differing paths. Snapshots live in `snapshot_dir` as `{"hash": ..., "data": ...}`. A missing snapshot is recorded; with `update_snapshots` (`--resttest-update-snapshots`) the ones whose hash changed are rewritten, and the others are left untouched.
+    """
+
+    def __init__(self, name, volatile = None, update = None):
+        self.name = name
+        self.volatile = volatile
+        self.update = update
+
+    @property
+    def path(self):
+        return os.path.join(conf.settings.snapshot_dir, f'{self.name}.json')
+
+    def __call__(self, value):
+        actual = tree(canonical(value), self.volatile)
+        update = self.update if self.update is not None else conf.settings.update_snapshots
+
+        try:
+            with open(self.path) as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            self._write(actual.hash, actual.value)
+            return True
+
+        if snapshot['hash'] == actual.hash:
+            return True
+
+        if update:
+            self._write(actual.hash, actual.value)
+            return True
+        raise SnapshotMismatch(self.name, list(diff(tree(snapshot['data']), actual)))
+
+    def _write(self, hash, data):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok = True)
+        with open(self.path, 'w') as f:
+            json.dump(dict(hash = hash, data = data), f, indent = 1)
+            f.write('\n')
+
+    def __repr__(self):
+        return f'matches_snapshot({self.name!r})'
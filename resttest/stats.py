@@ -0,0 +1,97 @@
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional
+
+observers = []
+
+
+@dataclass
+class Exchange:
+    """Single HTTP request/response pair, as seen by HTTPSession
+
+    `request_bytes` / `response_bytes` are body sizes before compression / after decompression, the `wire_` ones are what was actually transferred.
+    """
+
+    method: str
+    url: str
+    status: int
+    request_bytes: int
+    response_bytes: int
+    seconds: float
+    wire_request_bytes: Optional[int] = None
+    wire_response_bytes: Optional[int] = None
+
+    def __post_init__(self):
+        if self.wire_request_bytes is None:
+            self.wire_request_bytes = self.request_bytes
+        if self.wire_response_bytes is None:
+            self.wire_response_bytes = self.response_bytes
+
+
+class HTTPStats:
+    """HTTP usage counters"""
+
+    def __init__(self):
+        self.requests = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.wire_bytes_sent = 0
+        self.wire_bytes_received = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, session, exchange: Exchange):
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += exchange.request_bytes
+            self.bytes_received += exchange.response_bytes
+            self.wire_bytes_sent += exchange.wire_request_bytes
+            self.wire_bytes_received += exchange.wire_response_bytes
+            self.seconds += exchange.seconds
+
+    def __repr__(self):
+        return f'HTTPStats(requests = {self.requests}, bytes_sent = {self.bytes_sent}, bytes_received = {self.bytes_received}, wire_bytes_sent = {self.wire_bytes_sent}, wire_bytes_received = {self.wire_bytes_received}, seconds = {self.seconds:.3f})'
+
+
+@contextmanager
+def observe(observer = None):
+    """Call `observer(session, exchange)` for every request made within the block."""
+    observer = observer or HTTPStats()
+    observers.append(observer)
+    try:
+        yield observer
+    finally:
+        observers.remove(observer)
+
+
+def notify(session, exchange):
+    for observer in list(observers):
+        observer(session, exchange)
+
+
+@dataclass(frozen = True)
+class Budget:
+    """Upper limits of HTTP usage for a single test"""
+
+    requests: Optional[int] = None
+    seconds: Optional[float] = None
+    bytes: Optional[int] = None
+
+    def violations(self, stats: HTTPStats):
+        if self.requests is not None and stats.requests > self.requests:
+            yield f'{stats.requests} requests made, budget is {self.requests}'
+        if self.seconds is not None and stats.seconds > self.seconds:
+            yield f'{stats.seconds:.3f}s spent on the network, budget is {self.seconds}s'
+        if self.bytes is not None and stats.bytes_sent + stats.bytes_received > self.bytes:
+            yield f'{stats.bytes_sent + stats.bytes_received} bytes transferred, budget is {self.bytes}'
+
+
+def budget(requests = None, seconds = None, bytes = None):
+    """Fail the decorated test (when run through the resttest pytest plugin) if it exceeds the given HTTP usage."""
+
+    def decorator(func):
+        func.__resttest_budget__ = Budget(requests, seconds, bytes)
+        return func
+
+    return decorator
@@ -0,0 +1,113 @@
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import Any, Optional
+
+
+class BufferOverflow(ValueError):
+    """Stream sent a single line or event larger than the buffer allows"""
+
+
+@dataclass
+class Event:
+    """Decoded stream event"""
+
+    data: Any
+    event: Optional[str] = None
+    id: Optional[str] = None
+    received_at: float = 0.0
+    latency: Optional[float] = None
+
+
+def _lines(chunks, max_buffer):
+    """Split a stream of byte chunks into lines, holding at most `max_buffer` bytes of an incomplete line."""
+    buffer = b''
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buffer += chunk
+        *lines, buffer = buffer.split(b'\n')
+        for line in lines:
+            if len(line) > max_buffer:
+                raise BufferOverflow(f'Line longer than {max_buffer} bytes')
+            yield line.rstrip(b'\r')
+        if len(buffer) > max_buffer:
+            raise BufferOverflow(f'Line longer than {max_buffer} bytes')
+    if buffer:
+        yield buffer.rstrip(b'\r')
+
+
+def ndjson_events(chunks, max_buffer):
+    for line in _lines(chunks, max_buffer):
+        if line.strip():
+            yield None, None, line
+
+
+def sse_events(chunks, max_buffer):
+    """Parse text/event-stream - yields (event, id, data) for every dispatched event."""
+    event = None
+    last_id = None
+    data = []
+    size = 0
+    for line in _lines(chunks, max_buffer):
+        if not line:
+            if data:
+                yield event, last_id, b'\n'.join(data)
+            event = None
+            data = []
+            size = 0
+            continue
+        if line.startswith(b':'):
+            continue
+
+        field, _, value = line.partition(b':')
+        if value.startswith(b' '):
+            value = value[1:]
+
+        if field == b'data':
+            size += len(value)
+            if size > max_buffer:
+                raise BufferOverflow(f'Event larger than {max_buffer} bytes')
+            data.append(value)
+        elif field == b'event':
+            event = value.decode()
+        elif field == b'id':
+            last_id = value.decode()
+
+    if data:
+        yield event, last_id, b'\n'.join(data)
+
+
+def _timestamp(data, field):
+    value = data.get(field) if isinstance(data, dict) else getattr(data, field, None)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str) and value.endswith('Z'):
+        return datetime.fromisoformat(value[:-1]).replace(tzinfo = timezone.utc).timestamp()
+    if isinstance(value, (int, float)):
+        return float(value)
+    return None
+
+
+def decode_events(raw_events, decode, timestamp_field = None, loads = json.loads, allow_text = False):
+    """Decode (event, id, bytes) tuples into Events, measuring delivery latency against `timestamp_field` of the data.
+
+    With `allow_text`, data that is not JSON (SSE keepalives like `data: ping`) is passed through as a string.
+    """
+    for event, event_id, payload in raw_events:
+        received_at = perf_counter()
+        wall_clock = datetime.now(timezone.utc).timestamp()
+        try:
+            raw = loads(payload)
+        except ValueError:
+            if not allow_text:
+                raise
+            yield Event(payload.decode(errors = 'replace'), event, event_id, received_at)
+            continue
+        latency = None
+        if timestamp_field is not None:
+            sent_at = _timestamp(raw, timestamp_field)
+            if sent_at is not None:
+                latency = wall_clock - sent_at
+        yield Event(decode(raw), event, event_id, received_at, latency)
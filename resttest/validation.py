@@ -0,0 +1,504 @@
+import ipaddress
+import math
+import re
+
+undefined = object()
+
+
+class ValidationError(ValueError):
+    """Data does not conform to the schema"""
+
+    def __init__(self, message, path = None):
+        super().__init__(message)
+        self.message = message
+        self.path = path or []
+
+    def __str__(self):
+        location = ''.join(f'[{p}]' if isinstance(p, int) else f'.{p}' for p in self.path)
+        return f'${location}: {self.message}'
+
+
+def _get(schema, name, default = undefined):
+    if isinstance(schema, dict):
+        return schema.get(name, default)
+    # SchemalessObject - look keywords up in its dict, as a missing attribute costs a raised and caught exception.
+    data = getattr(schema, '_data', None)
+    if isinstance(data, dict):
+        return data.get(name, default)
+    return getattr(schema, name, default)
+
+
+def _items(mapping):
+    if isinstance(mapping, dict):
+        return mapping.items()
+    return mapping._data.items()
+
+
+_types = {
+    'null': lambda v: v is None,
+    'boolean': lambda v: v is True or v is False,
+    'integer': lambda v: isinstance(v, int) and not isinstance(v, bool),
+    'number': lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    'string': lambda v: isinstance(v, str),
+    'array': lambda v: isinstance(v, list),
+    'object': lambda v: isinstance(v, dict),
+}
+
+
+def _ip(version):
+    def check(value):
+        try:
+            return ipaddress.ip_address(value).version == version
+        except ValueError:
+            return False
+
+    return check
+
+
+def _regex(value):
+    try:
+        re.compile(value)
+    except re.error:
+        return False
+    return True
+
+
+_formats = {
+    'date-time': re.compile(r'\d{4}-\d\d-\d\d[Tt]\d\d:\d\d:\d\d(\.\d+)?([Zz]|[+-]\d\d:\d\d)').fullmatch,
+    'date': re.compile(r'\d{4}-\d\d-\d\d').fullmatch,
+    'time': re.compile(r'\d\d:\d\d:\d\d(\.\d+)?([Zz]|[+-]\d\d:\d\d)?').fullmatch,
+    'email': re.compile(r'[^@\s]+@[^@\s]+').fullmatch,
+    'hostname': re.compile(r'(?=.{1,253}$)[A-Za-z0-9]([A-Za-z0-9-]{0,61}[A-Za-z0-9])?(\.[A-Za-z0-9]([A-Za-z0-9-]{0,61}[A-Za-z0-9])?)*').fullmatch,
+    'uri': re.compile(r'[A-Za-z][A-Za-z0-9+.-]*:\S*').fullmatch,
+    'uri-reference': re.compile(r'\S*').fullmatch,
+    'uuid': re.compile(r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}').fullmatch,
+    'ipv4': _ip(4),
+    'ipv6': _ip(6),
+    'regex': _regex,
+}
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return ('object', frozenset((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, list):
+        return ('array', tuple(_freeze(v) for v in value))
+    if isinstance(value, bool):
+        return ('boolean', value)
+    return value
+
+
+def _equal(a, b):
+    return _freeze(a) == _freeze(b)
+
+
+def _nested(validate, key):
+    def validate_nested(value):
+        try:
+            validate(value)
+        except ValidationError as e:
+            e.path.insert(0, key)
+            raise
+
+    return validate_nested
+
+
+class Compiler:
+    """Compiles JSON Schema nodes into validator closures
+
+    Every schema node is compiled only once - regexes are precompiled and $refs resolved at compile time.
+    """
+
+    def __init__(self, document):
+        self.document = document
+        self._compiled = {}
+
+    def resolve(self, ref):
+        return self.document.resolve(ref)
+
+    def compile(self, schema):
+        key = id(schema)
+        try:
+            return self._compiled[key][1]
+        except KeyError:
+            pass
+
+        # Recursive schemas refer to themselves before they are compiled - go through a late-bound cell.
+        cell = []
+
+        def deferred(value):
+            return cell[0](value)
+
+        self._compiled[key] = (schema, deferred)
+        validate = self._compile(schema)
+        cell.append(validate)
+        self._compiled[key] = (schema, validate)
+        return validate
+
+    def _compile(self, schema):
+        if schema is True or schema == {}:
+            return _accept
+        if schema is False:
+            return _reject
+
+        ref = _get(schema, '$ref')
+        if ref is not undefined:
+            document, target = self.document.resolve_document(ref)
+            if document is not self.document:
+                return document.validator(target)
+            return self.compile(target)
+
+        checks = []
+        for keyword, compile_keyword in self._keywords:
+            value = _get(schema, keyword)
+            if value is not undefined:
+                check = compile_keyword(self, value, schema)
+                if check is not None:
+                    checks.append(check)
+
+        if not checks:
+            return _accept
+        if len(checks) == 1:
+            return checks[0]
+
+        checks = tuple(checks)
+
+        def validate(value):
+            for check in checks:
+                check(value)
+
+        return validate
+
+    def _type(self, schema_type, schema):
+        if isinstance(schema_type, list):
+            tests = tuple(_types[t] for t in schema_type)
+            name = ' or '.join(schema_type)
+
+            def check(value):
+                for test in tests:
+                    if test(value):
+                        return
+                raise ValidationError(f'{value!r} is not of type {name}')
+        else:
+            test = _types[schema_type]
+
+            def check(value):
+                if not test(value):
+                    raise ValidationError(f'{value!r} is not of type {schema_type}')
+
+        return check
+
+    def _const(self, const, schema):
+        def check(value):
+            if not _equal(value, const):
+                raise ValidationError(f'{value!r} is not {const!r}')
+
+        return check
+
+    def _enum(self, enum, schema):
+        try:
+            allowed = frozenset(_freeze(v) for v in enum)
+        except TypeError:
+            allowed = None
+
+        def check(value):
+            try:
+                if _freeze(value) in allowed:
+                    return
+            except TypeError:
+                if any(_equal(value, v) for v in enum):
+                    return
+            raise ValidationError(f'{value!r} is not one of {enum!r}')
+
+        return check
+
+    def _numeric(compare, message):
+        def compile_keyword(self, limit, schema):
+            def check(value):
+                if isinstance(value, (int, float)) and not isinstance(value, bool) and not compare(value, limit):
+                    raise ValidationError(f'{value!r} {message} {limit!r}')
+
+            return check
+
+        return compile_keyword
+
+    _minimum = _numeric(lambda v, l: v >= l, 'is less than')
+    _maximum = _numeric(lambda v, l: v <= l, 'is greater than')
+    _exclusive_minimum = _numeric(lambda v, l: v > l, 'is less than or equal to')
+    _exclusive_maximum = _numeric(lambda v, l: v < l, 'is greater than or equal to')
+    _multiple_of = _numeric(lambda v, l: math.isclose(v / l, round(v / l)), 'is not a multiple of')
+
+    def _sized(kind, compare, message):
+        def compile_keyword(self, limit, schema):
+            def check(value):
+                if isinstance(value, kind) and not compare(len(value), limit):
+                    raise ValidationError(f'{value!r} {message} {limit}')
+
+            return check
+
+        return compile_keyword
+
+    _min_length = _sized(str, lambda n, l: n >= l, 'is shorter than')
+    _max_length = _sized(str, lambda n, l: n <= l, 'is longer than')
+    _min_items = _sized(list, lambda n, l: n >= l, 'has fewer items than')
+    _max_items = _sized(list, lambda n, l: n <= l, 'has more items than')
+    _min_properties = _sized(dict, lambda n, l: n >= l, 'has fewer properties than')
+    _max_properties = _sized(dict, lambda n, l: n <= l, 'has more properties than')
+
+    del _numeric, _sized
+
+    def _pattern(self, pattern, schema):
+        search = re.compile(pattern).search
+
+        def check(value):
+            if isinstance(value, str) and not search(value):
+                raise ValidationError(f'{value!r} does not match {pattern!r}')
+
+        return check
+
+    def _format(self, format, schema):
+        test = _formats.get(format)
+        if test is None:
+            return None
+
+        def check(value):
+            if isinstance(value, str) and not test(value):
+                raise ValidationError(f'{value!r} is not a valid {format}')
+
+        return check
+
+    def _items(self, items, schema):
+        if isinstance(items, list):
+            validators = tuple(_nested(self.compile(s), i) for i, s in enumerate(items))
+            additional = _get(schema, 'additionalItems')
+            validate_additional = self.compile(additional) if additional is not undefined else _accept
+            offset = len(validators)
+
+            def check(value):
+                if isinstance(value, list):
+                    for validate, item in zip(validators, value):
+                        validate(item)
+                    for i, item in enumerate(value[offset:], offset):
+                        _nested(validate_additional, i)(item)
+
+            return check
+
+        validate = self.compile(items)
+        if validate is _accept:
+            return None
+
+        def check(value):
+            if isinstance(value, list):
+                for i, item in enumerate(value):
+                    try:
+                        validate(item)
+                    except ValidationError as e:
+                        e.path.insert(0, i)
+                        raise
+
+        return check
+
+    def _unique_items(self, unique, schema):
+        if not unique:
+            return None
+
+        def check(value):
+            if isinstance(value, list):
+                try:
+                    unique_count = len(set(_freeze(v) for v in value))
+                except TypeError:
+                    unique_count = len([v for i, v in enumerate(value) if not any(_equal(v, w) for w in value[:i])])
+                if unique_count != len(value):
+                    raise ValidationError(f'{value!r} has non-unique items')
+
+        return check
+
+    def _contains(self, contains, schema):
+        validate = self.compile(contains)
+
+        def check(value):
+            if isinstance(value, list) and not any(_passes(validate, item) for item in value):
+                raise ValidationError(f'{value!r} does not contain a matching item')
+
+        return check
+
+    def _properties(self, properties, schema):
+        validators = tuple((name, _nested(self.compile(subschema), name)) for name, subschema in _items(properties))
+
+        def check(value):
+            if isinstance(value, dict):
+                for name, validate in validators:
+                    if name in value:
+                        validate(value[name])
+
+        return check
+
+    def _pattern_properties(self, pattern_properties, schema):
+        validators = tuple((re.compile(pattern).search, self.compile(subschema)) for pattern, subschema in _items(pattern_properties))
+
+        def check(value):
+            if isinstance(value, dict):
+                for name, item in value.items():
+                    for search, validate in validators:
+                        if search(name):
+                            _nested(validate, name)(item)
+
+        return check
+
+    def _additional_properties(self, additional, schema):
+        properties = _get(schema, 'properties', {})
+        known = frozenset(name for name, _ in _items(properties))
+        patterns = tuple(re.compile(pattern).search for pattern, _ in _items(_get(schema, 'patternProperties', {})))
+        validate = self.compile(additional)
+
+        def check(value):
+            if isinstance(value, dict):
+                for name, item in value.items():
+                    if name in known or any(search(name) for search in patterns):
+                        continue
+                    if validate is _reject:
+                        raise ValidationError(f'unexpected property {name!r}')
+                    _nested(validate, name)(item)
+
+        return check
+
+    def _required(self, required, schema):
+        required = tuple(required)
+
+        def check(value):
+            if isinstance(value, dict):
+                for name in required:
+                    if name not in value:
+                        raise ValidationError(f'missing required property {name!r}')
+
+        return check
+
+    def _property_names(self, property_names, schema):
+        validate = self.compile(property_names)
+
+        def check(value):
+            if isinstance(value, dict):
+                for name in value:
+                    validate(name)
+
+        return check
+
+    def _dependencies(self, dependencies, schema):
+        validators = []
+        for name, dependency in _items(dependencies):
+            if isinstance(dependency, list):
+                validators.append((name, self._required(dependency, schema)))
+            else:
+                validators.append((name, self.compile(dependency)))
+        validators = tuple(validators)
+
+        def check(value):
+            if isinstance(value, dict):
+                for name, validate in validators:
+                    if name in value:
+                        validate(value)
+
+        return check
+
+    def _all_of(self, all_of, schema):
+        validators = tuple(self.compile(subschema) for subschema in all_of)
+
+        def check(value):
+            for validate in validators:
+                validate(value)
+
+        return check
+
+    def _any_of(self, any_of, schema):
+        validators = tuple(self.compile(subschema) for subschema in any_of)
+
+        def check(value):
+            for validate in validators:
+                if _passes(validate, value):
+                    return
+            raise ValidationError(f'{value!r} does not match any of the allowed schemas')
+
+        return check
+
+    def _one_of(self, one_of, schema):
+        validators = tuple(self.compile(subschema) for subschema in one_of)
+
+        def check(value):
+            matching = sum(1 for validate in validators if _passes(validate, value))
+            if matching != 1:
+                raise ValidationError(f'{value!r} matches {matching} of the schemas, expected exactly one')
+
+        return check
+
+    def _not(self, not_schema, schema):
+        validate = self.compile(not_schema)
+
+        def check(value):
+            if _passes(validate, value):
+                raise ValidationError(f'{value!r} should not match the schema')
+
+        return check
+
+    def _if(self, if_schema, schema):
+        validate_if = self.compile(if_schema)
+        then_schema = _get(schema, 'then')
+        else_schema = _get(schema, 'else')
+        validate_then = self.compile(then_schema) if then_schema is not undefined else _accept
+        validate_else = self.compile(else_schema) if else_schema is not undefined else _accept
+
+        def check(value):
+            if _passes(validate_if, value):
+                validate_then(value)
+            else:
+                validate_else(value)
+
+        return check
+
+    _keywords = [
+        ('type', _type),
+        ('const', _const),
+        ('enum', _enum),
+        ('minimum', _minimum),
+        ('maximum', _maximum),
+        ('exclusiveMinimum', _exclusive_minimum),
+        ('exclusiveMaximum', _exclusive_maximum),
+        ('multipleOf', _multiple_of),
+        ('minLength', _min_length),
+        ('maxLength', _max_length),
+        ('pattern', _pattern),
+        ('format', _format),
+        ('items', _items),
+        ('minItems', _min_items),
+        ('maxItems', _max_items),
+        ('uniqueItems', _unique_items),
+        ('contains', _contains),
+        ('required', _required),
+        ('minProperties', _min_properties),
+        ('maxProperties', _max_properties),
+        ('properties', _properties),
+        ('patternProperties', _pattern_properties),
+        ('additionalProperties', _additional_properties),
+        ('propertyNames', _property_names),
+        ('dependencies', _dependencies),
+        ('allOf', _all_of),
+        ('anyOf', _any_of),
+        ('oneOf', _one_of),
+        ('not', _not),
+        ('if', _if),
+    ]
+
+
+def _accept(value):
+    pass
+
+
+def _reject(value):
+    raise ValidationError(f'{value!r} is not allowed')
+
+
+def _passes(validate, value):
+    try:
+        validate(value)
+    except ValidationError:
+        return False
+    return True
@@ -34,7 +34,15 @@ setup(
         'redbaron',
     ],
 
+    extras_require = {
+        'bench': ['pytest-benchmark'],
+    },
+
     packages=find_packages(),
 
+    entry_points = {
+        'pytest11': ['resttest = resttest.pytest_plugin'],
+    },
+
     zip_safe=True,
 )
@@ -0,0 +1,33 @@
+import io
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+
+class FakeAPI(BaseAdapter):
+    """Transport adapter answering requests with `handler(request) -> (status, headers, body)` instead of the network"""
+
+    def __init__(self, handler):
+        super().__init__()
+        self.handler = handler
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append(request)
+        status, headers, body = self.handler(request)
+        resp = requests.Response()
+        resp.status_code = status
+        resp.headers.update(headers)
+        resp.raw = io.BytesIO(body)
+        resp.url = request.url
+        resp.request = request
+        return resp
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_api():
+    return FakeAPI
@@ -0,0 +1,73 @@
+import json
+
+from resttest.cache import CacheEntry, ResponseCache
+from resttest.http import HTTPSession
+
+
+class Things:
+    """Resource answering conditional GETs with 304 while its ETag is unchanged"""
+
+    def __init__(self):
+        self.version = 1
+
+    def __call__(self, request):
+        etag = f'"v{self.version}"'
+        if request.method != 'GET':
+            self.version += 1
+            return 204, {}, b''
+        if request.headers.get('If-None-Match') == etag:
+            return 304, {'ETag': etag}, b''
+        return 200, {'ETag': etag}, json.dumps(dict(version = self.version)).encode()
+
+
+def _session(fake_api, resource):
+    api = fake_api(resource)
+    return api, HTTPSession(base_url = 'http://api/', response_cache_bytes = 1024, adapter = api)
+
+
+def test_revalidation(fake_api):
+    api, session = _session(fake_api, Things())
+
+    first = session.get('things/1/')
+    second = session.get('things/1/')
+
+    assert second is first
+    assert api.requests[1].headers['If-None-Match'] == '"v1"'
+    assert (session.cache.hits, session.cache.misses) == (1, 1)
+
+
+def test_changed_resource(fake_api):
+    things = Things()
+    api, session = _session(fake_api, things)
+
+    session.get('things/1/')
+    things.version = 2
+    assert session.get('things/1/').data.version == 2
+    assert session.get('things/1/').data.version == 2
+    assert session.cache.hits == 1
+
+
+def test_writes_invalidate_path_and_collection(fake_api):
+    api, session = _session(fake_api, Things())
+
+    session.get('things/')
+    session.get('things/1/')
+    session.patch('things/1/', dict(name = 'x'))
+    session.get('things/')
+    session.get('things/1/')
+
+    assert 'If-None-Match' not in api.requests[-1].headers
+    assert 'If-None-Match' not in api.requests[-2].headers
+
+
+def test_lru_eviction():
+    cache = ResponseCache(max_bytes = 10)
+    cache.put(('http://api/a/', None, False), CacheEntry('"a"', None, 'a', 6))
+    cache.put(('http://api/b/', None, False), CacheEntry('"b"', None, 'b', 6))
+
+    assert cache.get(('http://api/a/', None, False)) is None
+    assert cache.get(('http://api/b/', None, False)).response == 'b'
+    assert cache.size == 6
+
+    cache.put(('http://api/c/', None, False), CacheEntry('"c"', None, 'c', 11))
+    assert len(cache) == 1
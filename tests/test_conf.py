@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+import resttest
+from resttest import conf
+
+
+@pytest.fixture
+def environ(monkeypatch, tmp_path):
+    """Clean settings environment: no pyproject.toml, no RESTTEST_* variables, not an xdist worker"""
+    monkeypatch.chdir(tmp_path)
+    for name in [name for name in os.environ if name.startswith(conf.ENV_PREFIX) or name == 'PYTEST_XDIST_WORKER']:
+        monkeypatch.delenv(name)
+
+    settings, unsharded = conf.settings, dict(conf._unsharded)
+    yield monkeypatch
+    conf.settings, conf.BASE_URL, conf.MAILCATCHER_URL = settings, settings.base_url, settings.mailcatcher_url
+    resttest.BASE_URL = settings.base_url
+    conf._unsharded.clear()
+    conf._unsharded.update(unsharded)
+
+
+def test_shard():
+    assert conf.shard(['http://a/', 'http://b/'], 3) == 'http://b/'
+    assert conf.shard('http://api-{worker}/', 2) == 'http://api-2/'
+
+
+def test_reload_shards_url_list(environ):
+    environ.setenv('RESTTEST_BASE_URL', 'http://a:1/, http://b:2/')
+    environ.setenv('PYTEST_XDIST_WORKER', 'gw1')
+    assert conf.reload().base_url == 'http://b:2/'
+    assert conf._unsharded['base_url'] == ['http://a:1/', 'http://b:2/']
+
+    environ.setenv('PYTEST_XDIST_WORKER', 'gw2')
+    assert conf.reshard().base_url == 'http://a:1/'
+
+
+def test_reshard_keeps_configured_settings(environ):
+    conf.configure(base_url = ['http://a/', 'http://b/'], timeout = 3.0)
+    environ.setenv('PYTEST_XDIST_WORKER', 'gw1')
+    settings = conf.reshard()
+    assert settings.base_url == 'http://b/'
+    assert settings.timeout == 3.0
+    assert conf.BASE_URL == 'http://b/'
+
+
+def test_environment_overrides_pyproject(environ, tmp_path):
+    (tmp_path / 'pyproject.toml').write_text('[tool.resttest]\ntimeout = 1.0\nretries = 2\n')
+    environ.setenv('RESTTEST_RETRIES', '5')
+    settings = conf.reload()
+    assert settings.timeout == 1.0
+    assert settings.retries == 5
+
+
+def test_unknown_setting(environ):
+    with pytest.raises(TypeError):
+        conf.load_settings(environ = {}, pyproject = '', colour = 'red')
@@ -0,0 +1,43 @@
+import typing
+
+from resttest.gendocs.meta import BoundMethod, BoundProperty, Instance, make_instance, property_type
+
+
+class Note:
+    doc: str
+    views: int
+
+    @property
+    def title(self) -> str:
+        return ''
+
+    def render(self) -> str:
+        return ''
+
+
+def test_property_type():
+    assert property_type(Note, 'doc') is str
+    assert property_type(Note, 'title') is str
+    assert property_type(Note, 'render') is BoundMethod
+
+
+def test_instance_properties():
+    note = Instance(Note, 'A note')
+    assert isinstance(note.doc, Instance) and note.doc.of is str
+    assert note.views.of is int
+    assert note.title.of is str
+    assert note.render.__self__ is note
+
+
+def test_instance_unknown_property():
+    note = Instance(Note)
+    note.var_name = 'note'
+    missing = note.missing
+    assert isinstance(missing, BoundProperty)
+    assert str(missing) == 'note.missing'
+
+
+def test_iterable_instance():
+    notes = make_instance(typing.Iterable[Note])
+    note = next(iter(notes))
+    assert note.of is Note
@@ -0,0 +1,44 @@
+import re
+
+import pytest
+import yaml
+
+from resttest.generate import PayloadGenerator, _Regex
+from resttest.schema import ALWAYS_DICTS, SchemaDocument, make_schemaless_object
+
+
+@pytest.mark.parametrize('pattern', [r'^[a-z]{2,5}-\d{1,3}$', r'^(AB|CD)[0-9a-f]{4}(-[A-Z])?$', r'[^a-z]*', r'(?:ab)+c?', r'[\w.-]+@[a-z]+\.(com|org)'])
+def test_regex(pattern):
+    generate = _Regex(pattern, PayloadGenerator().random).compile()
+    for _ in range(100):
+        assert re.search(pattern, generate())
+
+
+@pytest.mark.parametrize('pattern', [r'(a)\1', r'(?=a)', r'\bfoo'])
+def test_regex_unsupported(pattern):
+    with pytest.raises(ValueError):
+        _Regex(pattern, PayloadGenerator().random).compile()
+
+
+THING = """
+definitions:
+  Thing:
+    type: object
+    title: Thing
+    properties:
+      nick: {type: [string, 'null'], maxLength: 3}
+      negative: {type: integer, maximum: -5}
+      multiple: {type: integer, exclusiveMinimum: 10, multipleOf: 7}
+      code: {type: string, pattern: '^[A-Z]{2}[0-9]{3}$'}
+      tags: {type: array, items: {type: integer, minimum: 0, maximum: 3}, uniqueItems: true, minItems: 2}
+"""
+
+
+def test_generated_data_is_valid():
+    document = SchemaDocument(make_schemaless_object(yaml.safe_load(THING), ALWAYS_DICTS))
+    Thing = document.to_type(document.resolve('#/definitions/Thing'))
+
+    for item in PayloadGenerator(seed = 1).batch(Thing, 500):
+        Thing.__resttest_validator__(item)
+        assert item['negative'] <= -5
+        assert len(set(item['tags'])) == len(item['tags'])
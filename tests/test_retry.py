@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from resttest.http import BadGateway, HTTPSession
+from resttest.retry import Retry, parse_retry_after
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('3') == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('soon') is None
+    assert 55 < parse_retry_after(format_datetime(datetime.now(timezone.utc) + timedelta(seconds = 60), usegmt = True)) <= 60
+
+
+@pytest.mark.parametrize('method', ['GET', 'PUT', 'DELETE'])
+def test_idempotent_requests_are_retried(method):
+    retry = Retry(attempts = 3)
+    assert retry.delay(0, 502, {}, method) is not None
+    assert retry.delay(2, 504, {}, method) is not None
+
+
+def test_attempts_and_statuses():
+    retry = Retry(attempts = 2)
+    assert retry.delay(2, 503, {}) is None
+    assert retry.delay(0, 500, {}) is None
+    assert retry.delay(0, 404, {}) is None
+
+
+@pytest.mark.parametrize('method', ['POST', 'PATCH'])
+def test_non_idempotent_requests(method):
+    retry = Retry()
+    assert retry.delay(0, 502, {}, method) is None
+    assert retry.delay(0, 503, {}, method) is None
+    assert retry.delay(0, 503, {'Retry-After': '0'}, method) is not None
+    assert retry.delay(0, 429, {'Retry-After': '0'}, method) is not None
+    assert Retry(retry_non_idempotent = True).delay(0, 502, {}, method) is not None
+
+
+def test_backoff():
+    retry = Retry(backoff = 1.0, max_backoff = 2.0)
+    assert all(0 <= retry.delay(attempt, 503, {}) <= 2.0 for attempt in range(3) for _ in range(100))
+    assert 5.0 <= retry.delay(0, 429, {'Retry-After': '5'}) <= 6.0
+    assert Retry(respect_retry_after = False, backoff = 0.1).delay(0, 429, {'Retry-After': '5'}) <= 0.1
+
+
+def test_session_retries(fake_api, monkeypatch):
+    monkeypatch.setattr('resttest.http.sleep', lambda seconds: None)
+    statuses = iter([503, 502, 200])
+    api = fake_api(lambda request: (next(statuses), {}, b'{"ok": true}'))
+    session = HTTPSession(base_url = 'http://api/', retries = 3, adapter = api)
+
+    assert session.get('things/').data.ok
+    assert len(api.requests) == 3
+
+
+def test_session_does_not_retry_post(fake_api, monkeypatch):
+    monkeypatch.setattr('resttest.http.sleep', lambda seconds: None)
+    api = fake_api(lambda request: (502, {}, b'{}'))
+    session = HTTPSession(base_url = 'http://api/', retries = 3, adapter = api)
+
+    with pytest.raises(BadGateway):
+        session.post('things/', dict(name = 'x'))
+    assert len(api.requests) == 1